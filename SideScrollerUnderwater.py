@@ -2,11 +2,29 @@
 
 import pygame
 import random
-from string import ascii_uppercase
+from time import perf_counter
 from settings import *
 from helpers.spritesheet_functions import *
-from helpers.interval_trigger import *
+from helpers.timer_wheel import *
+from helpers.animation import *
 from helpers.transform_images import *
+from helpers.static_layer import *
+from helpers.spatial_hash import *
+from helpers.tile_collision import *
+from helpers.tile_store import *
+from helpers.asset_cache import *
+from helpers.image_cache import *
+from helpers.mob_store import *
+from helpers.flow_field import *
+from helpers.sim_lod import *
+from helpers.sprite_pool import *
+from helpers.world_chunks import *
+from helpers.world_snapshot import *
+from helpers.map_format import MappedMap, find_spawns
+from helpers.dirty_render import *
+from helpers.render_queue import *
+from helpers.resolution import *
+from helpers.sim_thread import *
 from sprites import *
 
 # mob_spritesheet = SpriteSheet('mobs')
@@ -18,6 +36,7 @@ class Camera:
     def __init__(self, game):
 
         self.rect = pygame.Rect(0, 0, SCREENWIDTH, SCREENHEIGHT)
+        self.prev_topleft = self.rect.topleft  # offset before last simulation tick (render interpolation)
         self.game = game
 
     def update(self, target):
@@ -49,201 +68,393 @@ class Map:
                 line = line.replace("\t", '')  # remove tab scape characters
                 self.data.append(line.strip())  # .strip prevents invisible new line characters being read from text file
 
-        self.width = len(self.data[0]) * TILESIZE  # pixel width of the map
-        self.height = len(self.data) * TILESIZE
+        self.cols = len(self.data[0])  # map size in tiles
+        self.rows = len(self.data)
+        self.width = self.cols * TILESIZE  # pixel width of the map
+        self.height = self.rows * TILESIZE
 
+    def region(self, col1, row1, col2, row2):
+        """ return map rows row1 - row2 sliced to columns col1 - col2 (inclusive)"""
+        return [tiles[col1:col2+1] for tiles in self.data[row1:row2+1]]
 
-class Grid(pygame.sprite.Group):
-    """Divide map into grid squares determined by GRIDHEIGHT, GRIDWIDTH.  Mobile sprites transfered to new grid sprite group
-     as they travel across the map for collision detection with platforms"""
+    def byte_rows(self):
+        """ whole map as list of rows of map character bytes (as MappedMap)"""
+        return [tiles.encode('ascii') for tiles in self.data]
 
-    def __init__(self, coordinates, x1, y1, x2, y2):
+    def spawns(self, col1, row1, col2, row2):
+        """ return list of (map character, col, row) entity spawns in tile range (inclusive)"""
+        return find_spawns(self.region(col1, row1, col2, row2), col1, row1)
 
-        pygame.sprite.Group.__init__(self)
-        self.coordinates = coordinates
-        self.x1 = x1  # x top left corner of grid
-        self.y1 = y1
-        self.x2 = x2
-        self.y2 = y2  # y bottom right corner grid
+
+class StreamedMap:
+    """ Map read from .txt file on demand (MAPSTREAMING).  Only the file position of each row held in memory, rows read
+    as chunks of the map are loaded"""
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.offsets = []  # file position of each row
+        offset = 0
+        for line in self.file:
+            if line.strip():
+                self.offsets.append(offset)
+            offset += len(line)
+
+        self.cols = len(self.read_row(0))
+        self.rows = len(self.offsets)
+        self.width = self.cols * TILESIZE
+        self.height = self.rows * TILESIZE
+
+    def read_row(self, row):
+        self.file.seek(self.offsets[row])
+        line = self.file.readline().decode()
+        return line.replace("\t", '').strip()
+
+    def region(self, col1, row1, col2, row2):
+        """ return map rows row1 - row2 sliced to columns col1 - col2 (inclusive)"""
+        return [self.read_row(row)[col1:col2+1] for row in range(row1, row2+1)]
+
+    def spawns(self, col1, row1, col2, row2):
+        """ return list of (map character, col, row) entity spawns in tile range (inclusive)"""
+        return find_spawns(self.region(col1, row1, col2, row2), col1, row1)
 
 
 class Game:
 
-    screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
     MOBCLASSES = {
         'dartfish': Dartfish,
         'spinefish': Spinefish,
         'daddyfish': Daddyfish
     }
 
-    def __init__(self):
+    def __init__(self, mapfile=MAPFILE, streaming=MAPSTREAMING, rendermode=RENDERMODE, scaling=RESOLUTIONSCALING,
+                 threaded=SIMTHREAD):
         # initialize game window, etc
         pygame.init()
         pygame.mixer.init()
         pygame.display.set_caption(TITLE)
         self.screen = pygame.display.set_mode((SCREENWIDTH, SCREENHEIGHT))
         self.camera = Camera(self)
+        self.static_layer = StaticLayer(self)  # pre-rendered platforms and background props
+        self.render_queue = RenderQueue()  # draw calls batched per layer
+        self.fonts = {}  # font size: Font - loaded once, see get_font
+        self.renderer = DirtyRenderer(self) if rendermode == 'dirty' else None  # None - full redraw every frame
+        # render scale lowered while frames run over budget (full redraw only - dirty rendering is already cheap)
+        self.governor = None
+        if scaling and self.renderer is None:
+            self.governor = ResolutionGovernor(self.screen.get_size(), 1 / (FPS or SIMRATE))
+        if threaded and self.renderer:
+            raise ValueError('dirty rect rendering reads the simulation directly - not supported with SIMTHREAD')
+        self.sim_thread = SimThread(self) if threaded else None  # None - update and draw in turn on the main thread
 
         self.clock = pygame.time.Clock()
         self.elapsed_time = 0  # from new game start
-        self.dt = 0  # time elapsed for 1 mainloop
+        self.dt = 1 / SIMRATE  # time elapsed for 1 simulation tick (fixed timestep)
+        self.alpha = 1  # fraction of a tick between previous and current tick drawn (render interpolation)
+        self.prev_topleft = {}  # sprite: rect topleft before last tick, see screen_position
+        self.spawner = None  # spawn_environment generator while environment still spawning
+        self.spawn_budget = SPAWNBUDGET  # seconds per frame spent spawning environment, None - all at once
         self.running = True  # game running
+        self.get_pressed = pygame.key.get_pressed  # keyboard state for player movement (replaced by scripted input when headless)
 
         # load background textures
         self.background = pygame.image.load(BACKGROUND).convert()
 
+        # get images from baked asset cache.  Spritesheets only sliced (and cache rebaked) if spritesheets, spritedata or TILESIZE changed
+        cache_key = asset_cache_key()
+        images = load_asset_cache(ASSETCACHE, cache_key)
+        if images is None:
+            images = self.load_images()
+            bake_asset_cache(ASSETCACHE, cache_key, images)
+        self.platform_images = images['platforms']
+        self.prop_images = images['props']
+        self.effects_images = images['effects']
+        self.player_images = images['player']
+        self.mob_images = images['mobs']
+        self.weapons_images = images['weapons']
+        self.masks = MaskCache()  # collision masks per image, see Player.collide_enemy, Missile.sweep_enemies
+        self.rotation_cache = RotationCache(masks=self.masks)  # mob images rotated to face player
+        self.animator = Animator()  # animation clips, registered once and shared by all sprites
+
+        self.streaming = streaming  # map loaded in chunks around the camera rather than all at once
+        if mapfile.endswith(COMPILEDMAPEXT):
+            self.map = MappedMap(mapfile)  # compiled map - tiles read from memory mapped file
+        elif self.streaming:
+            self.map = StreamedMap(mapfile)
+        else:
+            self.map = Map(mapfile)  # create map object from Map class
+        self.solid_grid = SolidGrid(self.map.cols, self.map.rows)  # platform collisions when COLLISIONMODE == 'tiles'
+        if not self.streaming:
+            self.solid_grid.fill(0, 0, self.map.byte_rows())
+        self.tiles = TileStore(self.map.cols, self.map.rows, self.platform_images)  # platform type and image per tile
+
+        self.spawnpoints = []  # locations adjacent platforms for spawning background props, pickups, effects etc
+        self.pristine = None  # WorldSnapshot of the world as first loaded - later games are a warm restart from it
+
+    def load_images(self):
+        """ slice images from spritesheets and create derived (resized, rotated) images.  Returns dictionary of image
+        dictionaries by spritesheet name, see asset_cache"""
+
         # init spritesheets
-        self.platform_spritesheet = SpriteSheet('platforms')  # takes file name (not inc file extension)
-        self.props_spritesheet = SpriteSheet('props')
-        self.effects_spritesheet = SpriteSheet('effects')
-        self.player_spritesheet = SpriteSheet('player')
-        self.mob_spritesheet = SpriteSheet('mobs')
-        self.weapons_spritesheet = SpriteSheet('weapons')
+        platform_spritesheet = SpriteSheet('platforms')  # takes file name (not inc file extension)
+        props_spritesheet = SpriteSheet('props')
+        effects_spritesheet = SpriteSheet('effects')
+        player_spritesheet = SpriteSheet('player')
+        mob_spritesheet = SpriteSheet('mobs')
+        weapons_spritesheet = SpriteSheet('weapons')
 
         # get images from spritesheets and store image surf to dictionary - dictionary ordered by category, then nested subcat if applicable
-        self.platform_images = self.platform_spritesheet.get_sprite_images(PLATFORMS)
-        self.prop_images = self.props_spritesheet.get_sprite_images(PROPS)
-        self.effects_images = self.effects_spritesheet.get_sprite_images(EFFECTS)
-        self.player_images = self.player_spritesheet.get_sprite_images(PLAYER)
-        self.mob_images = self.mob_spritesheet.get_sprite_images(MOBS)
-        self.weapons_images = self.weapons_spritesheet.get_sprite_images(WEAPONS)
-        # self.playerswim_images = self.player_spritesheet.get_sprite_images("player_swim", PLAYERMOBSDIM)
+        platform_images = platform_spritesheet.get_sprite_images(PLATFORMS)
+        prop_images = props_spritesheet.get_sprite_images(PROPS)
+        effects_images = effects_spritesheet.get_sprite_images(EFFECTS)
+        player_images = player_spritesheet.get_sprite_images(PLAYER)
+        mob_images = mob_spritesheet.get_sprite_images(MOBS)
+        weapons_images = weapons_spritesheet.get_sprite_images(WEAPONS)
+        # self.playerswim_images = player_spritesheet.get_sprite_images("player_swim", PLAYERMOBSDIM)
 
         # duplicate and transform images then append to dictionary
-        # for key, value in self.mob_images.items():
+        # for key, value in mob_images.items():
         #     mobsInverted = flip_images(value, (False, True))  # upside down mobs
-        #     self.mob_images[key] = (value, mobsInverted)  # tuple for holding (Upfacing, Downfacing)  images
+        #     mob_images[key] = (value, mobsInverted)  # tuple for holding (Upfacing, Downfacing)  images
 
         # get effects sprites
-        self.effects_images['enemyDeath2x1'] = resize_images(self.effects_images.get('enemyDeath'), (2*TILESIZE, 1*TILESIZE))
-        self.effects_images['enemyDeath4x4'] = resize_images(self.effects_images.get('enemyDeath'), (4 * TILESIZE, 4 * TILESIZE))
+        effects_images['enemyDeath2x1'] = resize_images(effects_images.get('enemyDeath'), (2*TILESIZE, 1*TILESIZE))
+        effects_images['enemyDeath4x4'] = resize_images(effects_images.get('enemyDeath'), (4 * TILESIZE, 4 * TILESIZE))
 
         # harpoon image rotated through 45 deg increments and stored to dictionary
-        self.weapons_images['harpoonNorthEast'] = rotate_images(self.weapons_images.get('harpoonEast'), 45)
-        self.weapons_images['harpoonNorth'] = rotate_images(self.weapons_images.get('harpoonEast'), 90)
-        self.weapons_images['harpoonNorthWest'] = rotate_images(self.weapons_images.get('harpoonEast'), 135)
-        self.weapons_images['harpoonWest'] = rotate_images(self.weapons_images.get('harpoonEast'), 180)
-        self.weapons_images['harpoonSouthWest'] = rotate_images(self.weapons_images.get('harpoonEast'), 225)
-        self.weapons_images['harpoonSouth'] = rotate_images(self.weapons_images.get('harpoonEast'), 270)
-        self.weapons_images['harpoonSouthEast'] = rotate_images(self.weapons_images.get('harpoonEast'), 315)
-
-        self.map = Map(path.join(repos, 'map.txt'))  # create map object from Map class, tilemap.py
-        self.grid_squares = []  # game map divided into grids (4 X 4 TILES). Grid class inherets pygame.sprite.Group for storing sprites
-        self.grid_setup()
-
-        self.spawnpoints = []  # locations adjacent platforms for spawning background props, pickups, effects etc
-
-    def grid_setup(self):
-
-        # setup coords (A1, A2, A3 ....)
-        AZ = list(ascii_uppercase)  # list alphabet A-Z
-        AZZ = AZ + list(ascii_uppercase) + [letter1+letter2 for letter1 in ascii_uppercase for letter2 in ascii_uppercase]  # extended list once map width exceeds 26 grid squares (A-Z + AA - ZZ)
-
-        x_grids = int((self.map.width - 2*TILESIZE)/GRIDWIDTH)  # total count of grid squares along map length
-        y_grids = int((self.map.height - 2*TILESIZE)/GRIDHEIGHT)  # total ""            "" map height
-
-        # generate grid squares
-        for j in range(y_grids):
-            x_coord = AZZ[j]  # 'A'
-            grid_row = []
-            for i in range(x_grids):
-                y_coord = str(i+1)  # '1'
-                grid_ref = (x_coord+y_coord)  # 'A1'
-                x1, y1 = TILESIZE + (i*GRIDWIDTH), TILESIZE + (j*GRIDHEIGHT)  # top left corner
-                x2, y2 = x1+GRIDWIDTH, y1+GRIDHEIGHT  # bottom right corner
-                grid = Grid(grid_ref, x1, y1, x2, y2)
-                grid_row.append(grid)
-            self.grid_squares.append(grid_row)  # each row nested list within main list
-
-    def assign_sprite_to_grid(self, sprite):
-        """ static sprites; platforms, pickups etc assigned on game init.  Mobile sprites reassigned as they travel across the map"""
-
-        (x_coord, y_coord) = sprite.rect.center
-        grid_col = (x_coord-TILESIZE)//GRIDWIDTH
-        grid_row = (y_coord-TILESIZE)//GRIDHEIGHT
-        self.grid_squares[grid_row][grid_col].add(sprite)
+        weapons_images['harpoonNorthEast'] = rotate_images(weapons_images.get('harpoonEast'), 45)
+        weapons_images['harpoonNorth'] = rotate_images(weapons_images.get('harpoonEast'), 90)
+        weapons_images['harpoonNorthWest'] = rotate_images(weapons_images.get('harpoonEast'), 135)
+        weapons_images['harpoonWest'] = rotate_images(weapons_images.get('harpoonEast'), 180)
+        weapons_images['harpoonSouthWest'] = rotate_images(weapons_images.get('harpoonEast'), 225)
+        weapons_images['harpoonSouth'] = rotate_images(weapons_images.get('harpoonEast'), 270)
+        weapons_images['harpoonSouthEast'] = rotate_images(weapons_images.get('harpoonEast'), 315)
+
+        return {
+            'platforms': platform_images,
+            'props': prop_images,
+            'effects': effects_images,
+            'player': player_images,
+            'mobs': mob_images,
+            'weapons': weapons_images
+        }
 
     def read_map_data(self):
-        """load map data from map.txt file: create platform, player, enemy sprites accordingly"""
-
-        for row, tiles in enumerate(self.map.data):
-            for col, tile in enumerate(tiles):
-
-                # load platform tiles:  walls, roof, floors ...
-                platform_type = PLATFORMKEY.get(tile)
-                if platform_type:
-                    img = random.choice(self.platform_images[platform_type])  # randomly select platform image
-                    ptf = Static_sprite(self, col, row, platform_type, img)
-                    self.all_sprites.add(ptf)
-
-                    if row in range(1, len(self.map.data)-1) and col in range(1, len(self.map.data[0])-1):  # exclude map boundary sprites
-                        if platform_type != 'tunnelLeft' and platform_type != 'tunnelRight':  # exclude tunnel entrance
-                            self.assign_sprite_to_grid(ptf)
-
-                    if platform_type == 'floor':
-                        self.spawnpoints.append((col, row))  # create spawnpoints adjacent to platform
-
-                # load enemy sprites
-                if tile == 'E':
-                    mobkey = random.choice(list(Game.MOBCLASSES.keys()))  # random choice of mob class
-                    img = self.mob_images[mobkey][0]
-                    mob = Game.MOBCLASSES[mobkey](self, col, row, mobkey, img)
-                    self.mob_sprites.add(mob)
-                    self.active_sprites.add(mob)
-                    self.all_sprites.add(mob)
-
-    def spawn_sprites(self, index, spawnpoint, n, spriteclass, spritekey, imglocation):
+        """load map data from map.txt file: store platform tiles, then create enemy sprites from the map's spawns"""
+
+        for row, tiles in enumerate(self.map.byte_rows()):
+            for col in platform_cols(tiles):  # empty tiles skipped without a python loop over them
+                self.load_tile(col, row, chr(tiles[col]), self.spawnpoints)
+        for tile, col, row in self.map.spawns(0, 0, self.map.cols - 1, self.map.rows - 1):
+            self.spawn_entity(col, row, tile)
+
+    def load_tile(self, col, row, tile, spawnpoints, rng=random):
+        """ store platform tile in self.tiles for map character.  Return platform TileRecord if indexed in
+        platform_hash (COLLISIONMODE == 'sprites'), otherwise None.  Entities are spawned by spawn_entity"""
+
+        # load platform tiles:  walls, roof, floors ...
+        platform_type = PLATFORMKEY.get(tile)
+        if platform_type:
+            variant = rng.randrange(len(self.platform_images[platform_type]))  # randomly select platform image
+            self.tiles.set(col, row, platform_type, variant)
+
+            if platform_type == 'floor':
+                spawnpoints.append((col, row))  # create spawnpoints adjacent to platform
+
+            if COLLISIONMODE == 'sprites':  # otherwise collisions use self.solid_grid
+                if row in range(1, self.map.rows-1) and col in range(1, self.map.cols-1):  # exclude map boundary tiles
+                    if platform_type != 'tunnelLeft' and platform_type != 'tunnelRight':  # exclude tunnel entrance
+                        size = self.platform_images[platform_type][variant].get_size()
+                        record = TileRecord(pygame.Rect((col*TILESIZE, row*TILESIZE), size), platform_type)
+                        self.platform_hash.insert(record)
+                        return record
+        return None
+
+    def spawn_entity(self, col, row, tile, rng=random):
+        """ create enemy sprite for entity map character (see map spawns()).  Return sprite"""
+
+        # load enemy sprites
+        if tile == 'E':
+            mobkey = rng.choice(list(Game.MOBCLASSES.keys()))  # random choice of mob class
+            img = self.mob_images[mobkey][0]
+            mob = Game.MOBCLASSES[mobkey](self, col, row, mobkey, img)
+            self.mob_sprites.add(mob)
+            self.mob_hash.insert(mob)
+            self.active_sprites.add(mob)
+            self.all_sprites.add(mob)
+            return mob
+
+    def spawn_sprites(self, spawnpoint, spriteclass, spritekey, imglocation, groups, rng=random):
         """ spawn secondary sprites/ background images not included within map data at random locations e.g. plants, bubble effects, pickups """
 
-        if index % n == 0:
-            img = random.choice(imglocation[spritekey])  # select random image
-            col = spawnpoint[0]
-            row = spawnpoint[1]
-            sprite = spriteclass(self, col, row, spritekey, img)
-            sprite.rect.bottomleft = sprite.pos  # sprite placed on top of platform
-            self.all_sprites.add(sprite)
-            return sprite
-
-    def generate_environment(self):
-        """ call spawn_sprites() to generate background images, background effects e.g. rising bubbles and pickup sprites"""
-        """ NEEDS REPLACING WITH A GENERATOR"""
-        random.shuffle(self.spawnpoints)
-        for i, point in enumerate(self.spawnpoints):
-
-            # passive sprites (not updated)
-            sprite = self.spawn_sprites(i, point, 200, Static_sprite, 'monument', self.prop_images)  # for every 200th floor tile spawn a monument
-            sprite = self.spawn_sprites(i, point, 50, Static_sprite, 'Statue', self.prop_images)  # for every 50th floor tile spawn a statue
-            sprite = self.spawn_sprites(i, point, 3, Static_sprite, 'vegetation', self.prop_images)
-            sprite = self.spawn_sprites(i, point, 256, Bubbles, 'bubbles', self.effects_images)
-            if sprite:
-                if sprite.refkey == 'bubbles':
-                    self.active_sprites.add(sprite)
+        img = rng.choice(imglocation[spritekey])  # select random image
+        col = spawnpoint[0]
+        row = spawnpoint[1]
+        sprite = spriteclass(self, col, row, spritekey, img)
+        sprite.rect.bottomleft = sprite.pos  # sprite placed on top of platform
+        sprite.add(groups)
+        return sprite
+
+    def spawn_environment(self, spawnpoints=None, rng=random):
+        """ generator: spawn background images, background effects e.g. rising bubbles and pickup sprites, yielding each
+        sprite spawned so spawning can be spread over several frames (see spawn_pending).  spawnpoints default to every
+        floor tile on the map"""
+        if spawnpoints is None:
+            spawnpoints = self.spawnpoints
+        rng.shuffle(spawnpoints)
+
+        spawntypes = (  # (1 in n floor tiles on average, sprite class, sprite key, images, groups)
+            # passive sprites (not updated) baked into static layer
+            (200, Static_sprite, 'monument', self.prop_images, self.static_sprites),  # a monument on 1 in 200 floor tiles
+            (50, Static_sprite, 'Statue', self.prop_images, self.static_sprites),  # a statue on 1 in 50 floor tiles
+            (3, Static_sprite, 'vegetation', self.prop_images, self.static_sprites),
+            # active sprites (updated and drawn every loop) - bubbles join active_sprites once started, see Bubbles
+            (256, Bubbles, 'bubbles', self.effects_images, (self.all_sprites, self.unindexed_sprites)),
+        )
+        # each floor tile draws for each type in turn, so density is the same however the map is split into
+        # spawnpoint lists (whole map or streamed chunks)
+        for spawnpoint in spawnpoints:
+            for n, spriteclass, spritekey, imglocation, groups in spawntypes:
+                if rng.randrange(n):
+                    continue
+                sprite = self.spawn_sprites(spawnpoint, spriteclass, spritekey, imglocation, groups, rng)
+                if spriteclass is Bubbles:
+                    sprite.spawnpoints = spawnpoints  # respawn within same area
+                yield sprite
+
+    def generate_environment(self, spawnpoints=None, rng=random):
+        """ spawn whole environment at once (see spawn_environment) e.g. streamed map chunk.  Return list of sprites spawned"""
+        return list(self.spawn_environment(spawnpoints, rng))
+
+    def spawn_pending(self, budget):
+        """ advance self.spawner for up to budget seconds (None - until finished).  Static sprites spawned are baked
+        straight into the static layer"""
+        if self.spawner is None:
+            return
+        end = None if budget is None else perf_counter() + budget
+        for sprite in self.spawner:
+            static = self.static_sprites.has(sprite)
+            if static:
+                self.static_layer.blit_sprite(sprite)
+                if self.renderer:
+                    self.renderer.reset()  # static layer changed under a still camera
+            if self.pristine:
+                self.pristine.add(sprite, static)
+            if end is not None and perf_counter() >= end:
+                return
+        self.spawner = None
+        if self.pristine:
+            self.pristine.finish()
 
     def new(self):
-        """Start a new game; load or reload map data, sprites"""
-        # init sprite groups
-        # self.platform_sprites = pygame.sprite.Group()
-        self.mob_sprites = pygame.sprite.Group()
-        self.hold_sprites = pygame.sprite.Group()  # sprites to be deleted once they go off screen
-        self.active_sprites = pygame.sprite.Group()  # sprites which are updated every loop
-        self.all_sprites = pygame.sprite.Group()  # for drawing only
+        """Start a new game.  Map data loaded and sprites created by the first game; later games are a warm restart
+        from self.pristine (see helpers/world_snapshot.py), unless the map is streamed"""
+        self.timers = TimerWheel()  # animation clock, timed events e.g. bubble respawns, weapon reload
+        self.elapsed_time = 0
+        self.kills = 0  # mobs shot dead
+        warm = self.pristine is not None and self.pristine.complete
+        if warm:
+            # empty groups and indexes rather than replace them - reused sprites must not keep the last game alive
+            for group in (self.mob_sprites, self.hold_sprites, self.active_sprites, self.all_sprites,
+                          self.unindexed_sprites, self.static_sprites):
+                group.empty()
+            self.mob_hash.clear()
+            self.pickup_hash.clear()
+            self.missile_pool.reset()
+        else:
+            # init sprite groups
+            # self.platform_sprites = pygame.sprite.Group()
+            self.mob_sprites = pygame.sprite.Group()
+            self.hold_sprites = pygame.sprite.Group()  # sprites to be deleted (or returned to pool) once they go off screen
+            self.active_sprites = pygame.sprite.Group()  # sprites which are updated every loop
+            self.all_sprites = pygame.sprite.Group()  # for drawing only
+            self.unindexed_sprites = pygame.sprite.Group()  # all_sprites not in mob_hash e.g. player, bubbles, see visible_sprites
+            self.static_sprites = pygame.sprite.Group()  # background props - never move, drawn via static_layer with self.tiles
+
+            # broadphase collision detection: sprites indexed by spatial hash cell (4 X 4 TILES)
+            self.platform_hash = SpatialHash()
+            self.mob_hash = SpatialHash(rect_attr='bounds')  # mobs indexed by image as drawn (rotated)
+            self.pickup_hash = SpatialHash()
+            self.mob_store = MobStore()  # mob simulation state, updated for all mobs in one vectorized pass
+            harpoon_img = self.weapons_images['harpoonEast'][0]
+            self.missile_pool = SpritePool(lambda: Missile(self, 0, 0, 'harpoon', harpoon_img), MISSILEPOOLSIZE)  # reused by Player.shoot
+        self.flow_field = FlowField(self.solid_grid)  # shared mob pathfinding towards the player
+        self.sim_lod = SimLOD(self)  # active sprites updated by distance from camera view
 
         # generate sprites
+        if self.renderer:
+            self.renderer.reset()
+        self.prev_topleft = {}
         self.player = Player(self, 6, 16, 'player', self.player_images['player_idle']['North'][0])  # xpos, ypos, width, height (in TILES i.e. 1 TILE X 2 TILES), image (first frame of North orientation by default)
         self.active_sprites.add(self.player)
         self.all_sprites.add(self.player)
-        self.read_map_data()
-        self.generate_environment()
+        self.unindexed_sprites.add(self.player)
+        if warm:
+            self.pristine.restore(self)  # platform tiles, static layer and platform_hash kept as loaded
+        elif self.streaming:
+            self.static_layer.chunks = {}
+            self.spawner = None  # environment spawned with each chunk
+            self.world = ChunkedWorld(self)  # map chunks loaded/ evicted as camera moves
+            self.camera.update(self.player)
+            self.world.update()
+        else:
+            self.spawnpoints = []
+            self.read_map_data()
+            self.pristine = WorldSnapshot(self)  # mobs as loaded, environment recorded as it spawns
+            self.static_layer.bake(self.static_sprites, self.tiles)  # pre-render platforms once per map load
+            self.spawner = self.spawn_environment()  # props, bubbles spawned within SPAWNBUDGET per frame, see run
+            self.spawn_pending(self.spawn_budget)
 
     def run(self):
-        """ Main game loop"""
+        """ Main game loop.  Simulation advanced in fixed ticks of 1 / SIMRATE s to catch up with time elapsed, then
+        drawn once, interpolated between the last two ticks"""
+        if self.sim_thread:
+            self.run_threaded()
+            return
         self.playing = True
+        accumulator = 0  # time elapsed not yet simulated
         while self.playing:
-            self.dt = self.clock.tick(FPS) / 1000  # time elapsed during a single loop (seconds)
-            self.elapsed_time += self.dt
+            accumulator += self.clock.tick(FPS) / 1000  # time elapsed during a single loop (seconds)
+            if self.governor:
+                self.governor.record(self.clock.get_rawtime() / 1000)  # last frame's time excluding frame rate cap
+            ticks = min(int(accumulator * SIMRATE), MAXSIMSTEPS)
+            if ticks == MAXSIMSTEPS:
+                accumulator = min(accumulator, MAXSIMSTEPS / SIMRATE)  # too far behind - drop backlog
             self.events()
-            self.update()
+            for tick in range(ticks):
+                if tick == ticks - 1:
+                    self.prev_topleft = self.tick_topleft()
+                    self.camera.prev_topleft = self.camera.rect.topleft
+                self.elapsed_time += self.dt
+                self.update()
+                accumulator -= self.dt
+            self.alpha = accumulator * SIMRATE
+            self.spawn_pending(self.spawn_budget)  # level start: environment streams in over the first frames
             self.draw()
+            self.flip()
+
+    def run_threaded(self):
+        """ Main game loop with the simulation on its own thread (SIMTHREAD): events and drawing the latest snapshot
+        only"""
+        self.playing = True
+        self.sim_thread.start()
+        try:
+            while self.playing:
+                self.clock.tick(FPS)
+                if self.governor:
+                    self.governor.record(self.clock.get_rawtime() / 1000)
+                self.events()
+                if self.sim_thread.error:
+                    raise self.sim_thread.error
+                self.draw()
+                self.flip()
+        finally:
+            self.sim_thread.stop()
+
+    def command(self, function):
+        """ call function on the simulation thread before its next tick (SIMTHREAD), otherwise straight away"""
+        if self.sim_thread:
+            self.sim_thread.command(function)
+        else:
+            function()
 
     def events(self):
 
@@ -257,83 +468,189 @@ class Game:
             if event.type == pygame.KEYDOWN:
                 # player actions (movement controls determined by key.get_pressed in Player class)
                 if event.key == pygame.K_LCTRL:
-                    self.player.shoot()
+                    self.command(self.player.shoot)
 
                 if event.key == pygame.K_q:
                     self.playing = False  # exit game
 
     def update(self):
         """Game Loop - Update"""
-        self.active_sprites.update()
+        self.timers.advance(self.dt)  # fire timed events due this tick
+        self.animator.advance(self.timers.now)
+        self.flow_field.update(self.player.rect.center)  # recomputed only when player changes tile
+        self.mob_store.update(self.player.rect, self.flow_field)  # move all mobs
+        self.sim_lod.update()  # active sprites: near every frame, mid throttled, far asleep
         self.camera.update(self.player)  # change camera rect position according to player position (centred on player rect)
-        # TODO kill sprites in hold_sprites group once they go off screen
+        if self.streaming:
+            self.world.update()  # load chunks coming into view, evict chunks left behind
+        # kill sprites in hold_sprites group once they go off screen (missiles returned to missile_pool)
         for sprite in self.hold_sprites:
-            if sprite.rect.right < (0-self.camera.rect.left) or sprite.rect.left > (2*SCREENWIDTH-self.camera.rect.right):
-                sprite.kill()
-            if sprite.rect.bottom < (0-self.camera.rect.top) or sprite.rect.top > (2*SCREENHEIGHT-self.camera.rect.bottom):
+            if self.off_screen(sprite.rect):
                 sprite.kill()
         # for sprite in self.mob_sprites:
         #     self.camera.update(sprite)
 
+    def off_screen(self, rect):
+        """ True if rect (map position) entirely outside camera view"""
+        if rect.right < (0-self.camera.rect.left) or rect.left > (2*SCREENWIDTH-self.camera.rect.right):
+            return True
+        if rect.bottom < (0-self.camera.rect.top) or rect.top > (2*SCREENHEIGHT-self.camera.rect.bottom):
+            return True
+        return False
+
+    def get_font(self, size):
+
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font('freesansbold.ttf', size)  # text font
+        return font
+
     def draw_text(self, text, size, colour, x, y):
 
-        font = pygame.font.Font('freesansbold.ttf', size)  # text font
+        font = self.get_font(size)
         text_surface = font.render(text, True, colour)
         text_rect = text_surface.get_rect()
         text_rect.center = (x, y)
         self.screen.blit(text_surface, text_rect)
-
-    def draw_grid(self):  # (rows,columns)
-        # Display grid squares for testing #
-        font = pygame.font.Font('freesansbold.ttf', 16)
-        text = font.render('GeeksForGeeks', True, GREEN, BLUE)
-
-        for row in self.grid_squares:
-            for grid in row:
-                x1 = grid.x1
-                y1 = grid.y1
-                x1 = x1 + self.camera.rect.x  # update with camera movement
-                y1 = y1 + self.camera.rect.y
-                pygame.draw.rect(self.screen, WHITE, [x1, y1, (GRIDWIDTH), (GRIDHEIGHT)], 1)
-                text = font.render(grid.coordinates, True, GREEN, BLUE)
+        return text_rect
+
+    def draw_grid(self, area=None):
+        # Display occupied platform hash cells for testing #  area - only cells overlapping area (screen position)
+        font = self.get_font(16)
+        size = self.platform_hash.cellsize
+
+        for key in self.platform_hash.cells:
+            row, col = divmod(key, KEYSTRIDE)
+            x1 = col*size + self.camera.rect.x  # update with camera movement
+            y1 = row*size + self.camera.rect.y
+            if area and not area.colliderect((x1, y1, size, size)):
+                continue
+            if -size < x1 < SCREENWIDTH and -size < y1 < SCREENHEIGHT:  # cell on screen
+                pygame.draw.rect(self.screen, WHITE, [x1, y1, size, size], 1)
+                text = font.render(str((col, row)), True, GREEN, BLUE)
                 textRect = text.get_rect()
                 textRect.topleft = (x1, y1)
                 self.screen.blit(text, textRect)
 
+    def interpolate(self, prev, current):
+        """ position self.alpha of the way from prev to current (last two simulation ticks)"""
+        if abs(current[0] - prev[0]) + abs(current[1] - prev[1]) > 2*TILESIZE:
+            return current  # teleported e.g. bubble respawned, missile relaunched - don't draw in between
+        return (round(prev[0] + (current[0] - prev[0])*self.alpha),
+                round(prev[1] + (current[1] - prev[1])*self.alpha))
+
+    def screen_position(self, sprite):
+        """ screen position of sprite interpolated between the last two simulation ticks"""
+        topleft = sprite.rect.topleft
+        prev = self.prev_topleft.get(sprite)
+        if prev is not None:
+            topleft = self.interpolate(prev, topleft)
+        return topleft[0] + self.camera.rect.x, topleft[1] + self.camera.rect.y
+
+    def visible_sprites(self, margin=2*TILESIZE):
+        """ list of all_sprites which may be drawn on screen: camera view widened by margin, covering sprites drawn up to
+        a tick behind (see interpolate).  Mobs found with mob_hash so mobs elsewhere on the map cost nothing"""
+        camera = self.camera.rect
+        view = pygame.Rect(-camera.x - margin, -camera.y - margin, SCREENWIDTH + 2*margin, SCREENHEIGHT + 2*margin)
+        visible = self.mob_hash.query_rect(view) + [sprite for sprite in self.unindexed_sprites
+                                                     if view.colliderect(sprite.rect)]
+        visible.sort(key=lambda sprite: getattr(sprite, 'slot', -1))  # overlapping mobs always drawn in the same order
+        return visible
+
+    def tick_topleft(self):
+        """ {sprite: rect topleft} before a tick, for sprites which may be drawn interpolated after it (see
+        screen_position).  Wider margin than visible_sprites as sprites and camera move during the tick"""
+        return {sprite: sprite.rect.topleft for sprite in self.visible_sprites(4*TILESIZE)}
+
     def draw(self):
         """Game Loop - draw"""
         pygame.display.set_caption("{:.2f}".format(self.clock.get_fps()))
-        self.screen.blit(self.background, (0, 0))  # draw background
-
-        for sprite in self.all_sprites:
-            sprite.draw()
+        if self.sim_thread:
+            self.draw_snapshot(self.sim_thread.buffer.read())
+            return
+        tick_topleft = self.camera.rect.topleft
+        self.camera.rect.topleft = self.interpolate(self.camera.prev_topleft, tick_topleft)  # camera drawn between ticks
+        if self.renderer:
+            self.renderer.draw()  # redraw changed areas only while camera still
+        else:
+            self.draw_scene()
+            self.draw_hud()
+        self.camera.rect.topleft = tick_topleft
+
+    def draw_scene(self):
+        """ draw background, platforms, props and sprites to whole screen"""
+        self.render_queue.add('background', self.background, (0, 0))  # draw background
+        self.static_layer.draw(self.render_queue)  # platforms, props within camera view
+        self.render_queue.add_sprites(self.visible_sprites(), self.screen_position)  # mobile sprites near the view only
+        self.submit_scene()
 
         # Testing only #
         self.draw_grid()
 
-        # current_grids = str(self.player.current_grids)
-        # self.draw_text(current_grids, 22, RED, SCREENWIDTH / 2, 15)
+    def submit_scene(self):
+        with surface_lock:  # no simulation thread surface work mid blit (SIMTHREAD)
+            if self.governor and self.governor.scale != 1:
+                self.governor.submit(self.render_queue, self.screen)  # drawn at reduced resolution, scaled up to screen
+            else:
+                self.render_queue.submit(self.screen)
+
+    def snapshot(self):
+        """ RenderSnapshot of the current tick for the main thread to draw (SIMTHREAD)"""
+        camera = self.camera.rect
+        sprites = tuple((sprite.layer, sprite.image, sprite.rect.topleft, self.prev_topleft.get(sprite))
+                        for sprite in self.visible_sprites())
+        # chunks in view anywhere between the last two ticks (interpolated camera)
+        chunks = tuple((chunk, (x - camera.x, y - camera.y))
+                       for chunk, (x, y) in self.static_layer.visible_chunks(camera, 2*TILESIZE))
+        return RenderSnapshot(perf_counter(), camera.topleft, self.camera.prev_topleft, sprites, chunks, self.hud_text())
+
+    def draw_snapshot(self, snapshot):
+        """ draw RenderSnapshot interpolated by time since it was published (SIMTHREAD)"""
+        if snapshot is None:
+            return  # first tick not simulated yet
+        self.alpha = min(1, (perf_counter() - snapshot.time) * SIMRATE)
+        camera_x, camera_y = self.interpolate(snapshot.prev_camera, snapshot.camera)
+        queue = self.render_queue
+        queue.add('background', self.background, (0, 0))
+        for chunk, (x, y) in snapshot.chunks:
+            queue.add('platforms', chunk, (x + camera_x, y + camera_y))
+        for layer, image, topleft, prev in snapshot.sprites:
+            if prev is not None:
+                topleft = self.interpolate(prev, topleft)
+            queue.add(layer, image, (topleft[0] + camera_x, topleft[1] + camera_y))
+        self.submit_scene()
+        self.draw_hud(snapshot.hud)
+
+    def draw_hud(self, text=None):
+        """ draw debug text (default hud_text()) over scene, return list of text rects"""
+        return [self.draw_text(*line) for line in (self.hud_text() if text is None else text)]
+
+    def hud_text(self):
+        """ debug text as list of (text, size, colour, x, y)"""
+        # current_cells = str(self.platform_hash.cell_range(self.player.rect))
+        # self.draw_text(current_cells, 22, RED, SCREENWIDTH / 2, 15)
 
         camera_position = (self.camera.rect.left, self.camera.rect.right)
         camera_position = str(camera_position)
-        self.draw_text(camera_position, 22, RED, SCREENWIDTH/2, SCREENHEIGHT- 15)
+        text = [(camera_position, 22, RED, SCREENWIDTH/2, SCREENHEIGHT- 15)]
 
         pos = str(self.player.pos)
-        self.draw_text(pos, 22, RED, 100, 15)
+        text.append((pos, 22, RED, 100, 15))
         # self.draw_text(self.player.direction, 22, RED, SCREENWIDTH - 50, 15)
         velocity = str(self.player.vel)
-        self.draw_text(velocity, 22, RED, SCREENWIDTH - 50, 15)
-        for mob in self.mob_sprites:
-            vel = (round(mob.vel[0], 3), round(mob.vel[1], 3))
-            speed = mob.vel.length()
-            vel = str(vel)
-            speed = str(round(speed))
-
-            # self.draw_text(speed, 22, RED, SCREENWIDTH - 100, 15)
-            # angle = str(round(mob.angle, 1))
-            # target_angle = str(round(mob.target_angle, 1))
-            # self.draw_text(angle, 22, RED, 30, 30)
-        pygame.display.flip()  # *after* drawing everything, flip the display
+        text.append((velocity, 22, RED, SCREENWIDTH - 50, 15))
+        # per mob debug text e.g. (mob velocity, speed, angle) - formatting every mob costs more than the frame budget
+        # with 1000 mobs, so only add for mobs being debugged
+        # for mob in self.mob_sprites:
+        #     speed = str(round(mob.vel.length()))
+        #     text.append((speed, 22, RED, SCREENWIDTH - 100, 15))
+        return text
+
+    def flip(self):
+        if self.renderer:
+            self.renderer.flip()  # update changed areas only, or whole display after a full redraw
+        else:
+            pygame.display.flip()  # *after* drawing everything, flip the display
 
     def show_start_screen(self):
         # game splash/start screen
@@ -346,11 +663,12 @@ class Game:
         pygame.display.flip()
 
 
-game = Game()
-game.show_start_screen()
-while game.running:
-    game.new()
-    game.run()
-    game.show_go_screen()
+if __name__ == '__main__':
+    game = Game()
+    game.show_start_screen()
+    while game.running:
+        game.new()
+        game.run()
+        game.show_go_screen()
 
-pygame.quit()
\ No newline at end of file
+    pygame.quit()
@@ -0,0 +1,204 @@
+# Headless simulation farm for AI/ balance sweeps
+# Runs seeded headless episodes (see headless.py) in worker processes, each with one combination of mob parameters,
+# and writes one CSV row per episode as episodes finish e.g.
+#     python farm.py --episodes 400 --param Enemy.chase_player_rad=360,720 --param Spinefish.max_hitpoints=10,20,40
+# Episodes end at the first mob contact (the player has no health yet, so contact stands in for death) or after
+# --frames frames.  The map is compiled once (see helpers/map_format.py) and memory mapped by every worker, sprite
+# images come from the baked asset cache (see helpers/asset_cache.py), and each worker builds one Game which is reused
+# for all of its episodes.  Every worker loads the same world (mob classes, props) from --seed, then each episode is a
+# warm restart of it (see helpers/world_snapshot.py) so episode seeds vary the play, not the map
+
+import headless  # sets SDL dummy video/ audio drivers - must be imported before pygame display is initialised
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+import pygame
+from settings import *
+from sprites import Enemy, Dartfish, Spinefish, Daddyfish
+from helpers.asset_cache import *
+from helpers.map_format import compile_map
+
+TUNABLE = {cls.__name__: cls for cls in (Enemy, Dartfish, Spinefish, Daddyfish)}
+PARAMS = ('runspeed', 'attack_speed', 'chase_player_rad', 'attack_player_rad', 'max_hitpoints')
+RESULTS = ('time_to_contact', 'contacts', 'kills', 'mobs', 'shots', 'frames', 'fps', 'worker')
+
+
+class BotInput:
+    """ stands in for ScriptedInput (see headless.py): swims towards the nearest mob until within range, backs off when
+    too close and fires whenever a mob is within range"""
+
+    def __init__(self, game, near=4*TILESIZE, far=8*TILESIZE):
+
+        self.game = game
+        self.near = near
+        self.far = far
+        self.target_distance = None  # distance to nearest mob, updated by pressed()
+
+    def pressed(self, frame):
+
+        player = self.game.player.rect.center
+        target, self.target_distance = None, None
+        for mob in self.game.mob_sprites:
+            dx, dy = mob.rect.centerx - player[0], mob.rect.centery - player[1]
+            distance = abs(dx) + abs(dy)
+            if self.target_distance is None or distance < self.target_distance:
+                target, self.target_distance = (dx, dy), distance
+        if target is None:
+            return headless.ScriptedKeys(())
+
+        sign = 1 if self.target_distance > self.far else -1 if self.target_distance < self.near else 0
+        dx, dy = target[0] * sign, target[1] * sign
+        held = []
+        if abs(dx) > TILESIZE / 2:
+            held.append(pygame.K_RIGHT if dx > 0 else pygame.K_LEFT)
+        if abs(dy) > TILESIZE / 2:
+            held.append(pygame.K_DOWN if dy > 0 else pygame.K_UP)
+        return headless.ScriptedKeys(held)
+
+    def fire(self, frame):
+        return self.target_distance is not None and self.target_distance < 2 * self.far
+
+
+class FarmGame(headless.HeadlessGame):
+    """ HeadlessGame for balance sweeps: nothing drawn, episode ends at the first mob contact"""
+
+    def __init__(self, mapfile, frames, bot):
+        super().__init__(mapfile, frames)
+        if bot:
+            self.input = BotInput(self)
+
+    def update(self):
+        super().update()
+        if self.player.contacts:
+            self.playing = False
+
+    def draw(self):
+        pass  # simulation only
+
+    def episode(self, seed, frames):
+        """ play one episode from a new game, return results"""
+
+        random.seed(seed)
+        self.frames = frames
+        self.frame = 0
+        self.new()
+        mobs = len(self.mob_sprites)
+        start = perf_counter()
+        self.run()
+        elapsed = perf_counter() - start
+        return {'time_to_contact': self.player.first_contact, 'contacts': self.player.contacts, 'kills': self.kills,
+                'mobs': mobs, 'shots': self.player.shots, 'frames': self.frame,
+                'fps': self.frame / elapsed if elapsed else 0, 'worker': os.getpid()}
+
+
+worker_game = None  # FarmGame built once per worker process by init_worker
+
+
+def init_worker(mapfile, frames, bot, seed):
+
+    global worker_game
+    worker_game = FarmGame(mapfile, frames, bot)
+    random.seed(seed)
+    worker_game.new()  # world loaded once - episodes restart from it
+    worker_game.spawn_pending(None)
+
+
+def run_episode(episode, seed, params, frames):
+    """ run in worker: episode with class attributes set from params {'Spinefish.max_hitpoints': 20}, return CSV row"""
+
+    original = []
+    for name, value in params.items():
+        cls, attr = parse_param(name)
+        original.append((cls, attr, cls.__dict__.get(attr)))
+        setattr(cls, attr, value)
+    try:
+        row = {'episode': episode, 'seed': seed}
+        row.update(params)
+        row.update(worker_game.episode(seed, frames))
+        return row
+    finally:
+        for cls, attr, value in reversed(original):  # next episode in this worker starts from the defaults
+            if value is None:
+                delattr(cls, attr)
+            else:
+                setattr(cls, attr, value)
+
+
+def parse_param(name):
+    """ 'Spinefish.max_hitpoints' -> (Spinefish, 'max_hitpoints')"""
+
+    classname, _, attr = name.partition('.')
+    if classname not in TUNABLE or attr not in PARAMS:
+        raise ValueError('{} - expected <{}>.<{}>'.format(name, '|'.join(TUNABLE), '|'.join(PARAMS)))
+    return TUNABLE[classname], attr
+
+
+def parameter_grid(param_args):
+    """ list of params dicts, one per combination of --param values"""
+
+    names, values = [], []
+    for arg in param_args:
+        name, _, options = arg.partition('=')
+        parse_param(name)
+        names.append(name)
+        values.append([float(option) for option in options.split(',')])
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def prepare_assets(mapfile):
+    """ compile mapfile once for all workers (memory mapped, shared page cache) and make sure the asset cache is baked
+    so workers don't all slice spritesheets and race to write it.  Return compiled map filename"""
+
+    if not mapfile.endswith(COMPILEDMAPEXT):
+        textfile, mapfile = mapfile, path.join(tempfile.mkdtemp(), 'farm' + COMPILEDMAPEXT)
+        compile_map(textfile, mapfile)
+    if baked_key(ASSETCACHE) != asset_cache_key():
+        pygame.display.init()
+        headless.Game(mapfile)  # bakes asset cache
+        pygame.quit()
+    return mapfile
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Headless balance sweep over mob parameters')
+    parser.add_argument('--episodes', type=int, default=100, help='episodes in total, spread over the parameter grid')
+    parser.add_argument('--frames', type=int, default=1800, help='frame limit per episode')
+    parser.add_argument('--seed', type=int, default=0, help='world and first episode seed')
+    parser.add_argument('--scenario', default='level1', choices=list(headless.SCENARIOS))
+    parser.add_argument('--param', action='append', default=[],
+                        help='<class>.<attribute>=value,value.. e.g. Dartfish.runspeed=2,4,6 (repeatable)')
+    parser.add_argument('--script', action='store_true', help='scripted patrol (headless.PATROL) instead of the bot')
+    parser.add_argument('--workers', type=int, help='worker processes (default one per CPU)')
+    parser.add_argument('--out', help='CSV file (default stdout)')
+    args = parser.parse_args()
+
+    grid = parameter_grid(args.param)
+    size, mobs = headless.SCENARIOS[args.scenario]
+    mapfile = headless.generate_map(size[0], size[1], mobs, args.seed) if size else MAPFILE
+    mapfile = prepare_assets(mapfile)
+
+    out = open(args.out, 'w', newline='') if args.out else sys.stdout
+    writer = csv.DictWriter(out, ['episode', 'seed'] + list(grid[0]) + list(RESULTS))
+    writer.writeheader()
+    start = perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(mapfile, args.frames, not args.script, args.seed)) as pool:
+        futures = [pool.submit(run_episode, episode, args.seed + episode, grid[episode % len(grid)], args.frames)
+                   for episode in range(args.episodes)]
+        for future in as_completed(futures):
+            writer.writerow(future.result())
+            out.flush()  # stream rows as episodes finish
+    if args.out:
+        out.close()
+    print('{} episodes in {:.1f} s'.format(args.episodes, perf_counter() - start), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+# Headless simulation & frame time benchmark
+# Runs Game without a window (SDL dummy video driver) using a fixed dt, seeded random and scripted keyboard input,
+# then reports per-phase timings (events, update, draw, flip) as JSON e.g.
+#     python headless.py --frames 600 --scenario level1 large_1000 --out bench_output.txt
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # must be set before pygame display is initialised
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # keep stdout valid JSON
+
+import argparse
+import gc
+import json
+import random
+import tempfile
+import tracemalloc
+from time import perf_counter
+import pygame
+from settings import *
+from sprites import Enemy
+from helpers.map_format import compile_map
+from SideScrollerUnderwater import Game
+
+PHASES = ('events', 'update', 'draw', 'flip')
+
+# (map size in tiles (cols, rows) or None for map.txt, number of mobs or None for mobs in map.txt)
+SCENARIOS = {
+    'level1': (None, None),
+    'small_10': ((66, 26), 10),
+    'small_200': ((66, 26), 200),
+    'medium_100': ((200, 60), 100),
+    'large_50': ((400, 120), 50),
+    'large_1000': ((400, 120), 1000),
+    'huge_2000': ((1000, 250), 2000),
+    'square_1000': ((1000, 1000), 1000),
+}
+
+# scripted input: (number of frames, keys held, fire harpoon every n frames (0 = never))
+PATROL = [
+    (40, (pygame.K_RIGHT,), 10),
+    (40, (pygame.K_DOWN,), 0),
+    (40, (pygame.K_LEFT, pygame.K_UP), 15),
+    (40, (pygame.K_UP,), 0),
+]
+
+
+class FixedClock:
+    """ stands in for pygame.time.Clock: returns a constant dt regardless of real frame time, with no frame rate cap"""
+
+    def __init__(self, fps):
+        self.dt_ms = 1000 / fps
+        self.clock = pygame.time.Clock()  # still measures real frame rate for get_fps()
+
+    def tick(self, framerate=0):
+        self.clock.tick()
+        return self.dt_ms
+
+    def get_rawtime(self):
+        return self.clock.get_rawtime()  # real frame time e.g. for dynamic resolution scaling
+
+    def get_fps(self):
+        return self.clock.get_fps()
+
+
+class ScriptedKeys:
+    """ replaces the ScancodeWrapper returned by pygame.key.get_pressed()"""
+
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return 1 if key in self.held else 0
+
+
+class ScriptedInput:
+    """ looping input script, see PATROL"""
+
+    def __init__(self, script):
+
+        self.steps = []  # expanded to one (keys, fire) entry per frame
+        for frames, held, fire_rate in script:
+            keys = ScriptedKeys(held)
+            for i in range(frames):
+                self.steps.append((keys, fire_rate and i % fire_rate == 0))
+
+    def pressed(self, frame):
+        return self.steps[frame % len(self.steps)][0]
+
+    def fire(self, frame):
+        return self.steps[frame % len(self.steps)][1]
+
+
+class HeadlessGame(Game):
+    """ Game run for a fixed number of frames with timings recorded for each phase of the main loop"""
+
+    def __init__(self, mapfile=MAPFILE, frames=600, script=PATROL, streaming=MAPSTREAMING, rendermode=RENDERMODE,
+                 spawn_budget=None, scaling=False, threaded=False):
+        super().__init__(mapfile, streaming, rendermode, scaling, threaded)
+        self.spawn_budget = spawn_budget  # None - environment spawned in Game.new so runs are reproducible
+        self.spawn_frames = 0  # frames drawn before environment finished spawning
+        if not threaded:
+            self.clock = FixedClock(FPS)  # threaded: simulation runs in real time so frames paced by the real clock
+        self.frames = frames  # frames to run before exiting
+        self.frame = 0
+        self.input = ScriptedInput(script)
+        self.get_pressed = lambda: self.input.pressed(self.frame)
+        self.timings = {phase: [] for phase in PHASES}
+        self.update_time = 0  # simulation ticks this frame
+        self.ticks = 0
+
+    def timed(self, phase, function):
+
+        start = perf_counter()
+        function()
+        self.timings[phase].append(perf_counter() - start)
+
+    def events(self):
+        if self.input.fire(self.frame):
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_LCTRL))
+        self.timed('events', super().events)
+
+    def update(self):
+        # simulation ticks per frame vary with frame rate (see Game.run) - update timed per frame, all ticks together
+        start = perf_counter()
+        super().update()
+        self.update_time += perf_counter() - start
+        self.ticks += 1
+
+    def draw(self):
+        # with SIMTHREAD update runs alongside draw - timed by game.sim_thread instead, frame time is main thread only
+        self.timings['update'].append(0 if self.sim_thread else self.update_time)
+        self.update_time = 0
+        if self.spawner is not None:
+            self.spawn_frames += 1
+        self.timed('draw', super().draw)
+
+    def flip(self):
+        self.timed('flip', super().flip)
+        self.frame += 1
+        if self.frame >= self.frames:
+            self.playing = False
+            self.running = False
+
+    def report(self):
+        """ return per-phase timing statistics in milliseconds"""
+
+        report = {}
+        frame_times = [sum(phase_times) for phase_times in zip(*self.timings.values())]
+        for phase, times in list(self.timings.items()) + [('frame', frame_times)]:
+            times = sorted(times)
+            if not times:
+                continue
+            report[phase] = {
+                'mean': 1000 * sum(times) / len(times),
+                'p50': 1000 * times[len(times) // 2],
+                'p95': 1000 * times[min(len(times) - 1, int(0.95 * len(times)))],
+                'max': 1000 * times[-1],
+            }
+        report['frames'] = len(frame_times)
+        report['ticks'] = self.ticks
+        report['fps'] = len(frame_times) / sum(frame_times) if frame_times else 0
+        return report
+
+
+def generate_map(cols, rows, mobs, seed):
+    """ write a random map of cols X rows tiles with floating floor platforms and mobs, return filename"""
+
+    rng = random.Random(seed)
+    tiles = [['.'] * cols for row in range(rows)]
+    for col in range(cols):
+        tiles[0][col] = '8'  # roof
+        tiles[rows - 1][col] = '2'  # floor
+    for row in range(1, rows - 1):
+        tiles[row][0] = '6'  # left wall
+        tiles[row][cols - 1] = '4'  # right wall
+
+    for i in range(cols * rows // 120):
+        row = rng.randrange(3, rows - 3)
+        col = rng.randrange(2, cols - 10)
+        for j in range(rng.randrange(3, 9)):
+            tiles[row][col + j] = '2'
+
+    # clear area around player start position (6, 16) - see Game.new
+    for row in range(14, 20):
+        for col in range(3, 11):
+            tiles[row][col] = '.'
+
+    empty = [(col, row) for row in range(2, rows - 2) for col in range(2, cols - 3)
+             if tiles[row][col] == '.' and not (3 <= col < 11 and 14 <= row < 20)]
+    for col, row in rng.sample(empty, min(mobs, len(empty))):
+        tiles[row][col] = 'E'
+
+    mapfile = path.join(tempfile.mkdtemp(), 'map_{}x{}_{}.txt'.format(cols, rows, mobs))
+    with open(mapfile, 'wt') as f:
+        for row in tiles:
+            f.write('\t'.join(row) + '\n')
+    return mapfile
+
+
+def game_memory():
+    """ bytes traced by tracemalloc outside this file, after collecting garbage - the game's allocations without the
+    benchmark's own e.g. HeadlessGame.timings, which grow every frame"""
+
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+def run_scenario(name, frames, seed, streaming=MAPSTREAMING, compiled=False, rendermode=RENDERMODE, spawn_budget=None,
+                 memory=False, scaling=False, threaded=False, restarts=0):
+
+    size, mobs = SCENARIOS[name]
+    mapfile = generate_map(size[0], size[1], mobs, seed) if size else MAPFILE
+    if compiled:
+        textfile, mapfile = mapfile, path.join(tempfile.mkdtemp(), name + COMPILEDMAPEXT)
+        compile_map(textfile, mapfile)
+
+    random.seed(seed)  # deterministic mob choice, prop placement, missile spread
+    Enemy.num_of_mobs = 0
+    load_start = perf_counter()
+    game = HeadlessGame(mapfile, frames, streaming=streaming, rendermode=rendermode, spawn_budget=spawn_budget,
+                        scaling=scaling, threaded=threaded)
+    init_time = perf_counter() - load_start
+    if memory:
+        tracemalloc.start()
+    load_start = perf_counter()
+    game.new()
+    load_time = perf_counter() - load_start
+    if memory:
+        new_memory = tracemalloc.get_traced_memory()[0]  # python allocations held by the loaded world
+        if not restarts:
+            tracemalloc.stop()
+    game.run()
+
+    restart_ms, restart_kb = [], []  # per warm restart (see helpers/world_snapshot.py): should stay flat
+    for restart in range(restarts):
+        game.frame = 0
+        game.running = True
+        load_start = perf_counter()
+        game.new()
+        restart_ms.append(1000 * (perf_counter() - load_start))
+        if memory:
+            restart_kb.append(game_memory() / 1024)
+        game.run()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    report = game.report()
+    report['scenario'] = name
+    report['map_tiles'] = [game.map.cols, game.map.rows]
+    report['mobs'] = Enemy.num_of_mobs
+    report['init_ms'] = 1000 * init_time
+    report['new_ms'] = 1000 * load_time
+    report['spawn_frames'] = game.spawn_frames
+    if restarts:
+        report['restart_ms'] = restart_ms
+        if memory:
+            report['restart_kb'] = restart_kb
+    if memory:
+        report['new_kb'] = new_memory / 1024
+    report['missile_pool'] = game.missile_pool.stats()
+    if game.streaming:
+        report['chunks'] = {'loaded': len(game.world.chunks), 'loads': game.world.loads, 'evictions': game.world.evictions}
+    report['lod'] = game.sim_lod.stats()  # actors per tier on the last frame
+    if game.renderer:
+        report['render'] = game.renderer.stats()
+    if game.governor:
+        report['resolution'] = game.governor.stats()
+    if game.sim_thread:
+        report['sim_thread'] = game.sim_thread.stats()
+    report['player_pos'] = [game.player.pos.x, game.player.pos.y]  # same seed and script should reproduce same end state
+    return report
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Headless frame time benchmark')
+    parser.add_argument('--frames', type=int, default=600, help='frames to simulate per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--stream', action='store_true', default=MAPSTREAMING, help='load map in chunks around the camera')
+    parser.add_argument('--compiled', action='store_true', help='convert map to compiled map format before running')
+    parser.add_argument('--render', default=RENDERMODE, choices=('full', 'dirty'), help='full or dirty rect rendering')
+    parser.add_argument('--spawn-budget', type=float, help='ms per frame spawning environment (default all in Game.new)')
+    parser.add_argument('--scaling', action='store_true',
+                        help='dynamic resolution scaling (off by default so frame times are comparable)')
+    parser.add_argument('--threaded', action='store_true', help='simulation on its own thread (real time, not fixed dt)')
+    parser.add_argument('--memory', action='store_true', help='report memory allocated by Game.new (slows loading)')
+    parser.add_argument('--restarts', type=int, default=0, help='new games started after the first, each run for --frames')
+    parser.add_argument('--out', help='write JSON report to file instead of stdout')
+    args = parser.parse_args()
+
+    spawn_budget = None if args.spawn_budget is None else args.spawn_budget / 1000
+    results = [run_scenario(name, args.frames, args.seed, args.stream, args.compiled, args.render, spawn_budget,
+                            args.memory, args.scaling, args.threaded, args.restarts)
+               for name in args.scenario]
+    output = json.dumps({'frames': args.frames, 'seed': args.seed, 'fixed_dt': 1 / FPS, 'streaming': args.stream,
+                         'compiled': args.compiled,
+                         'render': args.render, 'results': results}, indent=2)
+    if args.out:
+        with open(args.out, 'wt') as f:
+            f.write(output)
+    else:
+        print(output)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+from settings import *
+
+
+class Clip:
+    """ Animation registered once with Animator.clip: reel of frames shown period seconds each, looping or holding the
+    last frame.  table maps ticks since the clip started (within one cycle) to frame index"""
+
+    def __init__(self, frames, period, loop, tick):
+
+        self.frames = frames
+        self.loop = loop
+        period_ticks = max(1, round(period / tick))
+        self.ticks = period_ticks * len(frames)  # ticks for one cycle
+        self.duration = self.ticks * tick  # seconds for one cycle e.g. time until end of clip event
+        self.table = [t // period_ticks for t in range(self.ticks)]
+        self.stamp = None  # tick current was filled for
+        self.current = {}  # start tick: frame index at tick stamp - shared by every sprite started on the same tick
+
+
+class Animator:
+    """ Registry of animation clips with a shared clock (game.timers ticks).  A sprite holds a clip and the tick it
+    started playing (see Static_sprite.play); its current frame is worked out once per tick for all sprites playing the
+    same clip from the same tick, so thousands of bubbles or mobs animate for little more than a dictionary lookup each"""
+
+    def __init__(self, tick=1 / SIMRATE):
+
+        self.tick = tick
+        self.clips = {}  # key e.g. ('mobs', 'dartfish'): Clip
+        self.now = 0
+
+    def clip(self, key, frames, period, loop=True):
+        """ return clip registered as key, registering frames as a new clip if not already registered"""
+
+        clip = self.clips.get(key)
+        if clip is None:
+            clip = self.clips[key] = Clip(frames, period, loop, self.tick)
+        return clip
+
+    def advance(self, now):
+        self.now = now
+
+    def frame(self, clip, start):
+        """ index of frame showing now for clip started at tick start"""
+
+        if clip.stamp != self.now:
+            clip.stamp = self.now
+            clip.current.clear()
+        index = clip.current.get(start)
+        if index is None:
+            elapsed = self.now - start
+            index = clip.table[elapsed % clip.ticks] if clip.loop or elapsed < clip.ticks else clip.table[-1]
+            clip.current[start] = index
+        return index
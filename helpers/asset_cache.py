@@ -0,0 +1,104 @@
+# Baked asset cache: sliced, scaled and derived (resized/ rotated) sprite images packed into a single file so startup
+# loads raw pixel buffers instead of parsing XML and transforming every frame.
+# File layout: MAGIC | index length (4 bytes) | JSON index | pixel data
+# The index mirrors the image dictionaries (category -> [frames] or category -> subcat -> [frames]), each frame stored
+# as {'fmt', 'size', 'colorkey', 'offset', 'length'} into the pixel data.
+
+import hashlib
+import json
+import os
+import pygame
+from settings import *
+
+MAGIC = b'SSUCACHE'
+CACHEVERSION = 1  # increment if Game.load_images changes the derived images so existing caches are rebaked
+SHEETNAMES = ('platforms', 'props', 'effects', 'player', 'mobs', 'weapons')
+
+
+def asset_cache_key():
+    """ hash of every spritesheet .png/ .xml, spritedata file and TILESIZE - any change invalidates the cache"""
+
+    key = hashlib.sha1()
+    key.update('{}|{}'.format(CACHEVERSION, TILESIZE).encode())
+    for name in SHEETNAMES:
+        for filename in (path.join(repos, 'spritesheets', name + '.png'),
+                         path.join(repos, 'spritesheets', name + '.xml'),
+                         path.join(repos, 'spritedata', name + 'data.txt')):
+            with open(filename, 'rb') as f:
+                key.update(f.read())
+    return key.hexdigest()
+
+
+def bake_asset_cache(filename, key, images):
+    """ pack dictionary of image dictionaries (see Game.load_images) to filename"""
+
+    pixels = bytearray()
+
+    def pack(entry):
+        if isinstance(entry, dict):
+            return {name: pack(value) for name, value in entry.items()}
+        return [pack_frame(image) for image in entry]  # list of animation frames
+
+    def pack_frame(image):
+        fmt = 'RGBA' if image.get_flags() & pygame.SRCALPHA else 'RGB'
+        data = pygame.image.tostring(image, fmt)
+        colorkey = image.get_colorkey()
+        frame = {'fmt': fmt, 'size': image.get_size(), 'colorkey': colorkey and list(colorkey),
+                 'offset': len(pixels), 'length': len(data)}
+        pixels.extend(data)
+        return frame
+
+    index = json.dumps({'key': key, 'images': pack(images)}).encode()
+
+    os.makedirs(path.dirname(filename), exist_ok=True)
+    with open(filename + '.tmp', 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(index).to_bytes(4, 'little'))
+        f.write(index)
+        f.write(pixels)
+    os.replace(filename + '.tmp', filename)  # never leave a half written cache
+
+
+def baked_key(filename):
+    """ asset_cache_key the cache at filename was baked from, None if no cache - checked without loading any images"""
+
+    if not path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        index_length = int.from_bytes(f.read(4), 'little')
+        return json.loads(f.read(index_length))['key']
+
+
+def load_asset_cache(filename, key):
+    """ return dictionary of image dictionaries, or None if no cache or cache baked from different assets"""
+
+    if not path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+
+    start = len(MAGIC) + 4
+    index_length = int.from_bytes(data[len(MAGIC):start], 'little')
+    index = json.loads(data[start:start + index_length])
+    if index['key'] != key:
+        return None
+    pixels = memoryview(data)[start + index_length:]
+
+    def unpack(entry):
+        if isinstance(entry, dict):
+            return {name: unpack(value) for name, value in entry.items()}
+        return [unpack_frame(frame) for frame in entry]
+
+    def unpack_frame(frame):
+        buffer = pixels[frame['offset']:frame['offset'] + frame['length']]
+        image = pygame.image.frombuffer(buffer, frame['size'], frame['fmt'])
+        image = image.convert_alpha() if frame['fmt'] == 'RGBA' else image.convert()  # copy into display pixel format
+        if frame['colorkey']:
+            image.set_colorkey(frame['colorkey'])
+        return image
+
+    return unpack(index['images'])
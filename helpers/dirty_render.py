@@ -0,0 +1,105 @@
+import pygame
+from settings import *
+
+
+def merge_rects(rects):
+    """ replace overlapping rects with their union so no screen area is redrawn twice"""
+
+    merged = []
+    for rect in rects:
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect = rect.union(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    """ Dirty rect rendering (RENDERMODE == 'dirty').  While the camera is still only the screen areas under sprites
+    that moved, changed image or were killed (plus the debug text) are redrawn and pushed with
+    pygame.display.update(rects).  Any camera scroll falls back to a full redraw and pygame.display.flip().  Only sprites
+    near the camera view (game.visible_sprites) are tracked, so cost follows what is on screen, not map population"""
+
+    def __init__(self, game):
+
+        self.game = game
+        self.screen_rect = game.screen.get_rect()
+        self.camera_pos = None  # camera offset at last frame drawn, None forces a full redraw
+        self.drawn = {}  # visible sprite: (screen rect, image, render layer) as last drawn
+        self.hud_rects = []  # debug text drawn last frame
+        self.update_rects = None  # screen areas changed this frame, None if whole screen redrawn
+        self.full_frames = 0
+        self.dirty_frames = 0
+
+    def reset(self):
+        """ force full redraw next frame e.g. new game"""
+        self.camera_pos = None
+
+    def draw(self):
+
+        game = self.game
+        camera = game.camera
+        # area covered by image blitted at rect topleft (rotated mob images are larger than their rect)
+        drawn = {sprite: (pygame.Rect(game.screen_position(sprite), sprite.image.get_size()), sprite.image, sprite.layer)
+                 for sprite in game.visible_sprites()}
+
+        if camera.rect.topleft != self.camera_pos:
+            self.full_redraw(drawn)
+            return
+
+        dirty = list(self.hud_rects)
+        for sprite, (rect, image, layer) in drawn.items():
+            last = self.drawn.get(sprite)
+            if last is None:
+                dirty.append(rect)  # spawned
+            elif last[0] != rect or last[1] is not image:  # moved or animated
+                dirty.append(last[0].union(rect))
+        dirty += [last[0] for sprite, last in self.drawn.items() if sprite not in drawn]  # killed or left view
+        dirty = merge_rects([rect.clip(self.screen_rect) for rect in dirty if rect.colliderect(self.screen_rect)])
+
+        if sum(rect.width * rect.height for rect in dirty) > DIRTYFULLREDRAW * self.screen_rect.width * self.screen_rect.height:
+            self.full_redraw(drawn)  # most of the screen changed - cheaper to redraw everything
+            return
+
+        self.drawn = drawn
+        for rect in dirty:
+            self.redraw(rect)
+        self.hud_rects = game.draw_hud()
+        self.update_rects = dirty + self.hud_rects
+        self.dirty_frames += 1
+
+    def full_redraw(self, drawn):
+
+        self.drawn = drawn
+        self.camera_pos = self.game.camera.rect.topleft
+        self.game.draw_scene()
+        self.hud_rects = self.game.draw_hud()
+        self.update_rects = None
+        self.full_frames += 1
+
+    def redraw(self, rect):
+        """ restore background, static layer and sprites within rect (screen position)"""
+
+        game = self.game
+        queue = game.render_queue
+        queue.add('background', game.background, rect, rect)
+        game.static_layer.draw(queue, rect)
+        for sprite_rect, image, layer in self.drawn.values():
+            if rect.colliderect(sprite_rect):
+                queue.add(layer, image, sprite_rect)
+
+        game.screen.set_clip(rect)
+        queue.submit(game.screen)
+        game.draw_grid(rect)
+        game.screen.set_clip(None)
+
+    def flip(self):
+
+        if self.update_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.update_rects)
+
+    def stats(self):
+        return {'full_frames': self.full_frames, 'dirty_frames': self.dirty_frames}
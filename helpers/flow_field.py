@@ -0,0 +1,102 @@
+import numpy as np
+from collections import deque
+from settings import *
+
+OPENTABLE = bytes([1]) + bytes(255)  # solid grid byte to open tile: 0 (not solid) -> 1
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))  # (col, row) moves, orthogonal first
+
+
+class FlowField:
+    """ Shared mob navigation: breadth first search over non-solid tiles of game.solid_grid out from the player's tile,
+    within FLOWFIELDRADIUS tiles.  Each reachable tile stores a unit vector towards its neighbour nearest the player, so
+    any number of mobs find their way around walls with one lookup each.  Recomputed only when the player changes tile
+    (or map chunks are loaded/ evicted)"""
+
+    def __init__(self, solid_grid, radius=FLOWFIELDRADIUS):
+
+        self.grid = solid_grid
+        self.radius = radius
+        self.size = 2*radius + 1  # field covers size X size tiles centred on the player
+        self.origin = (0, 0)  # map (col, row) of field top left tile
+        self.distance = np.full((self.size, self.size), -1)  # [row, col] steps to player tile, -1 unreachable
+        self.direction = np.zeros((self.size, self.size, 2))  # [row, col] unit vector towards player, (0, 0) if none
+        self.target = None  # player tile the field was computed for
+        self.grid_changes = None  # solid_grid.changes when computed
+        self.recomputes = 0
+
+    def update(self, point):
+        """ recompute field if point (player centre) has moved to another tile or the solid grid has changed"""
+
+        tile = (int(point[0] // TILESIZE), int(point[1] // TILESIZE))
+        if tile == self.target and self.grid.changes == self.grid_changes:
+            return False
+        self.target = tile
+        self.grid_changes = self.grid.changes
+        self.compute()
+        self.recomputes += 1
+        return True
+
+    def compute(self):
+
+        size, grid = self.size, self.grid
+        col0, row0 = self.target[0] - self.radius, self.target[1] - self.radius
+        self.origin = (col0, row0)
+
+        # open tiles within field, with a closed border tile all round so the search needs no bounds checks.  Map
+        # boundary excluded (handled by Mobile_sprite.atMapBoundaries)
+        width = size + 2
+        open_tiles = bytearray(width * width)
+        col1, col2 = max(1, col0), min(grid.cols - 1, col0 + size)
+        for row in range(max(1, row0), min(grid.rows - 1, row0 + size)):
+            offset = row*grid.cols
+            index = (row - row0 + 1)*width + col1 - col0 + 1
+            open_tiles[index:index + col2 - col1] = grid.tiles[offset + col1:offset + col2].translate(OPENTABLE)
+
+        distance = [-1] * (width * width)
+        start = (self.radius + 1)*width + self.radius + 1
+        distance[start] = 0  # player tile - seeded even if solid e.g. player in tunnel entrance
+        queue = deque([start])
+        offsets = (1, -1, width, -width)
+        while queue:
+            index = queue.popleft()
+            steps = distance[index] + 1
+            for offset in offsets:
+                next_index = index + offset
+                if open_tiles[next_index] and distance[next_index] < 0:
+                    distance[next_index] = steps
+                    queue.append(next_index)
+
+        # direction of each tile = step to the neighbour with the fewest steps to the player.  Diagonal steps only
+        # where both orthogonal neighbours are open, so mobs don't cut wall corners
+        self.distance = np.array(distance).reshape(width, width)[1:-1, 1:-1]
+        steps = np.where(self.distance < 0, np.inf, self.distance)
+        padded = np.pad(steps, 1, constant_values=np.inf)
+        neighbours = np.empty((len(STEPS), size, size))
+        for i, (d_col, d_row) in enumerate(STEPS):
+            neighbours[i] = padded[1 + d_row:1 + d_row + size, 1 + d_col:1 + d_col + size]
+            if d_col and d_row:
+                blocked = np.isinf(padded[1:1 + size, 1 + d_col:1 + d_col + size]) | \
+                          np.isinf(padded[1 + d_row:1 + d_row + size, 1:1 + size])
+                neighbours[i][blocked] = np.inf
+        best = np.argmin(neighbours, axis=0)
+        downhill = np.take_along_axis(neighbours, best[None], axis=0)[0] < steps
+
+        unit_steps = np.array([np.array(step) / np.hypot(*step) for step in STEPS])
+        self.direction = np.where(downhill[..., None], unit_steps[best], 0.0)
+
+    def direction_at(self, col, row):
+        """ unit vector (x, y) from map tile towards the player, (0, 0) if tile outside field or no path"""
+
+        col, row = col - self.origin[0], row - self.origin[1]
+        if 0 <= col < self.size and 0 <= row < self.size:
+            return tuple(self.direction[row, col].tolist())
+        return 0.0, 0.0
+
+    def directions(self, points):
+        """ direction_at for array of map points (pixels) e.g. every mob centre at once"""
+
+        tiles = (points // TILESIZE).astype(int) - self.origin
+        inside = ((tiles >= 0) & (tiles < self.size)).all(axis=1)
+        directions = np.zeros((len(points), 2))
+        directions[inside] = self.direction[tiles[inside, 1], tiles[inside, 0]]
+        return directions
@@ -0,0 +1,120 @@
+import pygame
+from collections import OrderedDict
+from settings import *
+from helpers.sim_thread import surface_lock
+
+
+def surface_bytes(image):
+    return image.get_bytesize() * image.get_width() * image.get_height()
+
+
+class RotationCache:
+    """ Pre-rotated animation frames keyed by (refkey, frame index, angle bucket, flipped).  Angles quantized to
+    ROTATIONSTEPS buckets; frames rotated lazily on first use and least recently used frames evicted once the cache
+    exceeds ROTATIONCACHEBYTES.  masks - MaskCache whose masks of evicted frames are discarded with them"""
+
+    def __init__(self, steps=ROTATIONSTEPS, max_bytes=ROTATIONCACHEBYTES, masks=None):
+
+        self.steps = steps  # number of angle buckets through 360 deg
+        self.bucket_angle = 360 / steps
+        self.max_bytes = max_bytes
+        self.masks = masks
+        self.images = OrderedDict()  # key: rotated image, oldest first
+        self.bytes = 0  # memory used by rotated images
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.images)
+
+    def get(self, refkey, frame_index, image, angle):
+        """ return image flipped (if facing left) and rotated to nearest angle bucket.  angle in degrees anticlockwise
+        from the x-axis as Mobile_sprite.angle"""
+
+        bucket = round(angle / self.bucket_angle) % self.steps
+        flipped = angle < -90 or angle > 90  # upside down when facing left
+        key = (refkey, frame_index, bucket, flipped)
+
+        rotated = self.images.get(key)
+        if rotated is not None:
+            self.images.move_to_end(key)  # most recently used
+            self.hits += 1
+            return rotated
+
+        self.misses += 1
+        with surface_lock:
+            if flipped:
+                image = pygame.transform.flip(image, False, True)
+            rotated = pygame.transform.rotate(image, bucket * self.bucket_angle)
+        self.images[key] = rotated
+        self.bytes += surface_bytes(rotated)
+
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            oldkey, oldimage = self.images.popitem(last=False)  # least recently used
+            self.bytes -= surface_bytes(oldimage)
+            if self.masks:
+                self.masks.discard(oldimage)
+        return rotated
+
+    def clear(self):
+
+        if self.masks:
+            for image in self.images.values():
+                self.masks.discard(image)
+        self.images.clear()
+        self.bytes = 0
+
+
+class MaskCache:
+    """ Collision mask and hitbox rects per image (animation frame, rotated frame from RotationCache), built on first
+    use.  Sprites collide by a cheap hitbox overlap test first, then pixel masks - images placed at rect.topleft as
+    drawn, so rotated mobs collide by the pixels on screen"""
+
+    def __init__(self):
+
+        self.masks = {}  # image: pygame.mask.Mask
+        self.hitboxes = {}  # (image, ratio): image rect scaled by ratio about its centre, relative to image topleft
+        self.mask_tests = 0
+
+    def __len__(self):
+        return len(self.masks)
+
+    def mask(self, image):
+
+        mask = self.masks.get(image)
+        if mask is None:
+            with surface_lock:
+                mask = self.masks[image] = pygame.mask.from_surface(image)  # colorkey (BLACK) pixels left out
+        return mask
+
+    def hitbox(self, image, ratio, topleft):
+        """ rect of image scaled by ratio about its centre (as pygame.sprite.collide_rect_ratio) for image at topleft"""
+
+        box = self.hitboxes.get((image, ratio))
+        if box is None:
+            width, height = image.get_size()
+            box = self.hitboxes[(image, ratio)] = pygame.Rect(0, 0, round(width * ratio), round(height * ratio))
+            box.center = (width // 2, height // 2)
+        return box.move(topleft)
+
+    def overlap(self, image1, topleft1, image2, topleft2):
+        """ True if any opaque pixels of image1 at topleft1 and image2 at topleft2 overlap"""
+
+        self.mask_tests += 1
+        offset = (round(topleft2[0] - topleft1[0]), round(topleft2[1] - topleft1[1]))
+        return self.mask(image1).overlap(self.mask(image2), offset) is not None
+
+    def collide(self, sprite1, sprite2, ratio):
+        """ True if hitboxes overlap and then opaque pixels overlap"""
+
+        image1, image2 = sprite1.image, sprite2.image
+        if not self.hitbox(image1, ratio, sprite1.rect.topleft).colliderect(self.hitbox(image2, ratio, sprite2.rect.topleft)):
+            return False
+        return self.overlap(image1, sprite1.rect.topleft, image2, sprite2.rect.topleft)
+
+    def discard(self, image):
+        """ forget image e.g. evicted from RotationCache"""
+
+        self.masks.pop(image, None)
+        for key in [key for key in self.hitboxes if key[0] is image]:
+            del self.hitboxes[key]
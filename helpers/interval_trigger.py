@@ -1,8 +0,0 @@
-
-
-def trigger(time_elapsed, interval, dt):
-
-    if (time_elapsed+dt) % interval < time_elapsed % interval:
-        print(time_elapsed, 'Boo!')
-        yield True
-
@@ -0,0 +1,118 @@
+# Compiled map format: map.txt converted once to a binary file which is opened with mmap, so tiles are read straight
+# from the (shared) page cache without parsing or building strings for the whole map.
+# File layout (little endian):
+#     header: MAGIC, version, cols, rows, number of spawns
+#     tiles: cols * rows uint8 map characters, row major (same characters as map.txt e.g. b'8', b'.', b'E')
+#     spawns: (uint8 map character, uint32 col, uint32 row) per entity tile, sorted by row then col
+# Convert a text map with:
+#     python -m helpers.map_format map.txt map.ssumap
+
+import mmap
+import struct
+import sys
+from bisect import bisect_left
+from settings import *
+
+MAGIC = b'SSUMAP'
+VERSION = 1
+HEADER = struct.Struct('<6sHIII')
+SPAWN = struct.Struct('<BII')
+ENTITYKEYS = b'E'  # map characters stored in the spawn list (mobs)
+
+
+def read_text_map(filename):
+    """ return list of rows (strings) from tab separated map.txt"""
+
+    rows = []
+    with open(filename, 'rt') as f:
+        for line in f:
+            line = line.replace("\t", '').strip()
+            if line:
+                rows.append(line)
+    for row, tiles in enumerate(rows):
+        if len(tiles) != len(rows[0]):
+            raise ValueError('{} row {} is {} tiles wide, expected {}'.format(filename, row, len(tiles), len(rows[0])))
+    return rows
+
+
+def find_spawns(rows, col1=0, row1=0):
+    """ return list of (map character, col, row) entity spawns in rows of map characters with top left tile at
+    (col1, row1), sorted by row then col - for text maps, which have no spawn table"""
+
+    entities = ENTITYKEYS.decode('ascii')
+    return [(tile, col, row) for row, tiles in enumerate(rows, row1) for col, tile in enumerate(tiles, col1)
+            if tile in entities]
+
+
+def compile_map(textfile, mapfile):
+    """ convert text map to compiled map format"""
+
+    rows = read_text_map(textfile)
+    spawns = find_spawns(rows)
+
+    with open(mapfile, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(rows[0]), len(rows), len(spawns)))
+        f.write(''.join(rows).encode('ascii'))
+        for tile, col, row in spawns:
+            f.write(SPAWN.pack(ord(tile), col, row))
+
+
+class MappedMap:
+    """ Compiled map opened with mmap.  Answers tile and row slice queries without materialising the whole map"""
+
+    def __init__(self, filename):
+
+        self.file = open(filename, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.cols, self.rows, self.spawn_count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a version {} compiled map'.format(filename, VERSION))
+
+        self.tiles_offset = HEADER.size
+        self.spawns_offset = self.tiles_offset + self.cols * self.rows
+        self.width = self.cols * TILESIZE  # pixel width of the map
+        self.height = self.rows * TILESIZE
+        self.spawn_rows = None  # row of each spawn, read on first spawns() query
+
+    def tile(self, col, row):
+        """ map character at (col, row)"""
+        return chr(self.buffer[self.tiles_offset + row*self.cols + col])
+
+    def row_slice(self, row, col1, col2):
+        """ bytes of map characters in row from col1 to col2 (inclusive)"""
+        offset = self.tiles_offset + row*self.cols
+        return self.buffer[offset + col1:offset + col2 + 1]
+
+    def region(self, col1, row1, col2, row2):
+        """ return map rows row1 - row2 sliced to columns col1 - col2 (inclusive)"""
+        return [self.row_slice(row, col1, col2).decode('ascii') for row in range(row1, row2 + 1)]
+
+    def byte_rows(self):
+        """ whole map as list of rows of map character bytes - for loading the whole map at once.  Sliced straight
+        from the mapped file, never decoded to strings"""
+        return [self.row_slice(row, 0, self.cols - 1) for row in range(self.rows)]
+
+    def spawns(self, col1, row1, col2, row2):
+        """ return list of (map character, col, row) entity spawns in tile range (inclusive) from the spawn table,
+        sorted by row then col - no tiles scanned"""
+
+        if self.spawn_rows is None:
+            self.spawn_rows = [self.spawn(i)[2] for i in range(self.spawn_count)]
+        first = bisect_left(self.spawn_rows, row1)
+        last = bisect_left(self.spawn_rows, row2 + 1)
+        return [spawn for spawn in map(self.spawn, range(first, last)) if col1 <= spawn[1] <= col2]
+
+    def spawn(self, index):
+        tile, col, row = SPAWN.unpack_from(self.buffer, self.spawns_offset + index*SPAWN.size)
+        return chr(tile), col, row
+
+    def close(self):
+
+        self.buffer.close()
+        self.file.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m helpers.map_format map.txt map{}'.format(COMPILEDMAPEXT))
+    compile_map(sys.argv[1], sys.argv[2])
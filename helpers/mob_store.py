@@ -0,0 +1,139 @@
+import numpy as np
+from settings import *
+
+
+class MobStore:
+    """ Structure of arrays holding the simulation state of every mob (position, velocity, hitpoints, runspeed, angle).
+    update() runs a single vectorized pass per frame computing target vectors, chase/ attack radius tests, velocities
+    and angles for all mobs.  Enemy sprites are thin views: they read their rect position and angle back from the store
+    for drawing"""
+
+    FIELDS = {  # name: (columns, dtype)
+        'pos': (2, float),  # position in pixels (rect topleft)
+        'vel': (2, float),
+        'target': (2, float),  # displacement vector from mob centre to player centre
+        'half': (2, int),  # half rect size (rect centre = topleft + half)
+        'hitpoints': (1, float),
+        'runspeed': (1, float),
+        'attack_speed': (1, float),
+        'chase_rad': (1, float),  # chase player if within radius
+        'attack_rad': (1, float),  # attack player ""          ""
+        'angle': (1, float),  # angle subtended from vector (1, 0) i.e. anticlockwise from the x-axis
+        'inuse': (1, bool),  # slot holds a live mob
+        'awake': (1, bool),  # moved by update, see SimLOD
+    }
+
+    def __init__(self, capacity=64):
+
+        self.capacity = 0
+        self.count = 0  # slots used so far (arrays valid up to count)
+        self.mobs = []  # Enemy sprite per slot, None once mob killed
+        self.free = []  # slots released by killed mobs, reused before adding new slots
+        self.grow(capacity)
+
+        # results of last update as python lists - cheap for sprites to index every frame
+        self.topleft = []  # rect topleft for this frame
+        self.angles = []
+
+    def grow(self, capacity):
+        """ reallocate arrays with room for capacity mobs, keeping existing data"""
+
+        for name, (columns, dtype) in MobStore.FIELDS.items():
+            shape = (capacity, columns) if columns > 1 else (capacity,)
+            array = np.zeros(shape, dtype)
+            if self.capacity:
+                array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def add(self, mob):
+        """ return slot index for new mob.  Called before Sprite.__init__ so mob attributes can be set into the store"""
+
+        if self.free:
+            slot = self.free.pop()
+            self.mobs[slot] = mob
+        else:
+            if self.count == self.capacity:
+                self.grow(2 * self.capacity)  # amortised growth for maps with thousands of mobs
+            slot = self.count
+            self.count += 1
+            self.mobs.append(mob)
+
+        for name in MobStore.FIELDS:
+            getattr(self, name)[slot] = 0
+        self.inuse[slot] = True
+        self.awake[slot] = True
+        return slot
+
+    def set_params(self, slot, mob):
+        """ copy mob class parameters (may be overridden by subclass e.g. Dartfish.runspeed) into the store"""
+
+        self.runspeed[slot] = mob.runspeed
+        self.attack_speed[slot] = mob.attack_speed
+        self.chase_rad[slot] = mob.chase_player_rad
+        self.attack_rad[slot] = mob.attack_player_rad
+        self.half[slot] = (mob.rect.width // 2, mob.rect.height // 2)
+
+    def remove(self, slot):
+
+        self.inuse[slot] = False
+        self.vel[slot] = 0
+        self.mobs[slot] = None
+        self.free.append(slot)
+
+    def save(self):
+        """ return copy of the arrays (up to count) and slots e.g. pristine state for a warm restart, see restore"""
+
+        arrays = {name: getattr(self, name)[:self.count].copy() for name in MobStore.FIELDS}
+        return arrays, list(self.mobs), list(self.free)
+
+    def restore(self, saved):
+        """ overwrite store with state returned by save() - arrays reused, grown only if too small"""
+
+        arrays, mobs, free = saved
+        count = len(mobs)
+        if count > self.capacity:
+            self.grow(count)
+        for name, array in arrays.items():
+            getattr(self, name)[:count] = array
+            getattr(self, name)[count:] = 0
+        self.count = count
+        self.mobs = list(mobs)
+        self.free = list(free)
+        self.topleft = []
+        self.angles = []
+
+    def update(self, target_rect, flow_field=None):
+        """ move all mobs towards/ attack the target (player) rect.  Chasing mobs follow flow_field around walls where
+        it has a path from their tile, otherwise head straight for the target"""
+
+        n = self.count
+        pos = self.pos[:n]
+        vel = self.vel[:n]
+        target = self.target[:n]
+        alive = self.inuse[:n] & (self.hitpoints[:n] > 0) & self.awake[:n]
+
+        # find new target vector from mob centre to target centre (rect positions rounded as pygame.Rect)
+        centre = np.floor(pos + 0.5) + self.half[:n]
+        np.subtract(target_rect.center, centre, out=target)
+        distance = np.hypot(target[:, 0], target[:, 1])
+
+        # chase player: angle sprite so facing direction of travel and accelerate towards player
+        # velocity component = sqrt(runspeed * |heading component|) where heading = unit vector along path * runspeed
+        chase = alive & (self.attack_rad[:n] < distance) & (distance < self.chase_rad[:n])
+        heading = target[chase] / distance[chase, None]
+        if flow_field is not None:
+            path = flow_field.directions(centre[chase])
+            has_path = path.any(axis=1)
+            heading[has_path] = path[has_path]
+        self.angle[:n][chase] = -np.degrees(np.arctan2(heading[:, 1], heading[:, 0]))
+        vel[chase] = self.runspeed[:n][chase, None] * np.sqrt(np.abs(heading)) * np.sign(heading)
+
+        # attack player: dart along current direction at attack speed
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        attack = alive & (distance < self.attack_rad[:n]) & (speed > 0)
+        vel[attack] *= (self.attack_speed[:n][attack] / speed[attack])[:, None]
+
+        self.topleft = pos.tolist()  # rect position this frame, before moving
+        self.angles = self.angle[:n].tolist()
+        pos += vel * self.awake[:n, None]  # killed mobs have zero velocity, sleeping mobs stay put
@@ -0,0 +1,48 @@
+import pygame
+from settings import *
+
+
+class RenderQueue:
+    """ Draw calls collected per layer as (surface, dest[, area]) and submitted layer by layer, back to front
+    (RENDERLAYERS), one Surface.blits call per layer.  Z order set by layer rather than sprite group order"""
+
+    def __init__(self, layers=RENDERLAYERS):
+
+        self.layers = {layer: [] for layer in layers}  # dict order is draw order
+
+    def add(self, layer, surface, dest, area=None):
+        self.layers[layer].append((surface, dest) if area is None else (surface, dest, area))
+
+    def add_sprites(self, sprites, position):
+        """ queue sprite images on their sprite.layer at position(sprite) (screen position)"""
+
+        layers = self.layers
+        for sprite in sprites:
+            layers[sprite.layer].append((sprite.image, position(sprite)))
+
+    def submit(self, surface):
+        """ blit queued draw calls to surface and empty the queue"""
+
+        for calls in self.layers.values():
+            if calls:
+                surface.blits(calls, False)
+                calls.clear()
+
+    def submit_scaled(self, surface, scale, scaled):
+        """ blit queued draw calls to surface with positions scaled by scale, images replaced by scaled(image) e.g.
+        reduced resolution rendering (see helpers/resolution.py).  Calls falling outside surface are dropped before
+        any image is scaled.  Empties the queue"""
+
+        width, height = surface.get_size()
+        for calls in self.layers.values():
+            blits = []
+            for call in calls:
+                image, dest = call[0], call[1]
+                x, y = round(dest[0] * scale), round(dest[1] * scale)
+                if len(call) == 3:
+                    blits.append((scaled(image), (x, y), pygame.Rect([round(v * scale) for v in call[2]])))
+                elif x < width and y < height and x + image.get_width()*scale > 0 and y + image.get_height()*scale > 0:
+                    blits.append((scaled(image), (x, y)))
+            if blits:
+                surface.blits(blits, False)
+            calls.clear()
@@ -0,0 +1,96 @@
+import weakref
+from collections import deque
+import pygame
+from settings import *
+
+
+class ResolutionGovernor:
+    """ Dynamic resolution scaling (RESOLUTIONSCALING).  Watches a rolling window of frame times and steps the render
+    scale down through RESOLUTIONSCALES while frames run over budget, back up once there is headroom.  The window is
+    refilled after every change before the next (hysteresis) so the scale doesn't flip-flop.  A scale which turns out
+    no faster than the one above it (scaling up to the screen can cost more than the smaller draw saves) is backed out
+    of and skipped from then on.  Below full scale the world is drawn into a smaller surface from scaled copies of the
+    images, then scaled up to the screen"""
+
+    def __init__(self, screen_size, budget, scales=RESOLUTIONSCALES, window=RESOLUTIONWINDOW):
+
+        self.screen_size = screen_size
+        self.budget = budget  # seconds per frame
+        self.scales = scales
+        self.level = 0  # index of current scale
+        self.frame_times = deque(maxlen=window)
+        self.trial = None  # (previous level, mean frame time at previous level) while a lower scale is on trial
+        self.skipped = set()  # levels found no faster than the level above - not used again
+        self.surfaces = {}  # scale: surface world drawn into, created on first use
+        self.images = weakref.WeakKeyDictionary()  # image: {scale: scaled image} - dropped with the image
+        self.frames = {scale: 0 for scale in scales}  # frames drawn at each scale
+        self.changes = 0
+
+    @property
+    def scale(self):
+        return self.scales[self.level]
+
+    def record(self, frame_time):
+        """ add time taken by the last frame (seconds), change scale once the window is full"""
+
+        self.frames[self.scale] += 1
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+
+        mean = sum(self.frame_times) / len(self.frame_times)
+        if self.trial:
+            level, previous_mean = self.trial
+            self.trial = None
+            if mean >= previous_mean:  # lower scale didn't help
+                self.skipped.add(self.level)
+                self.set_level(level)
+                return
+
+        if mean > RESOLUTIONHIGH * self.budget:
+            lower = [level for level in range(self.level + 1, len(self.scales)) if level not in self.skipped]
+            if lower:
+                self.trial = (self.level, mean)
+                self.set_level(lower[0])
+        elif mean < RESOLUTIONLOW * self.budget and self.level > 0:
+            self.set_level(max(level for level in range(self.level) if level not in self.skipped))
+
+    def set_level(self, level):
+
+        self.level = level
+        self.frame_times.clear()
+        self.changes += 1
+
+    def scaled(self, image):
+        """ image scaled to the current scale, cached until image is garbage collected or discarded"""
+
+        scales = self.images.get(image)
+        if scales is None:
+            scales = self.images[image] = {}
+        scaled = scales.get(self.scale)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            scaled = scales[self.scale] = pygame.transform.scale(image, size)
+            colorkey = image.get_colorkey()
+            if colorkey:
+                scaled.set_colorkey(colorkey, pygame.RLEACCEL)
+        return scaled
+
+    def discard(self, image):
+        """ forget scaled copies of image e.g. static layer chunk blitted into"""
+        self.images.pop(image, None)
+
+    def submit(self, queue, screen):
+        """ draw queued draw calls at the current scale, then scale up to fill screen"""
+
+        surface = self.surfaces.get(self.scale)
+        if surface is None:
+            size = (round(self.screen_size[0] * self.scale), round(self.screen_size[1] * self.scale))
+            surface = self.surfaces[self.scale] = pygame.Surface(size).convert()
+        queue.submit_scaled(surface, self.scale, self.scaled)
+        pygame.transform.scale(surface, self.screen_size, screen)
+
+    def stats(self):
+        return {'scale': self.scale, 'changes': self.changes, 'skipped': [self.scales[level] for level in sorted(self.skipped)],
+                'frames': {str(scale): n for scale, n in self.frames.items()}}
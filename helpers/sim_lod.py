@@ -0,0 +1,82 @@
+import numpy as np
+from settings import *
+
+NEAR, MID, FAR = range(3)  # index into LODTIERS
+
+
+class SimLOD:
+    """ Simulation level of detail for game.active_sprites, by distance outside the camera view.  Near actors (within
+    LODNEAR) update every frame.  Mid actors (within LODMID) update every LODMIDINTERVAL frames, staggered, with no
+    image transform, passed the frames since their last update (up to LODMIDINTERVAL) as steps so self-moving actors
+    e.g. bubbles, missiles keep their speed.  Far actors sleep: not updated and mobs not moved by MobStore until back
+    within LODMID.  Animation frames come from the game.timers clock so nothing needs catching up on waking"""
+
+    def __init__(self, game, near=LODNEAR, mid=LODMID, interval=LODMIDINTERVAL):
+
+        self.game = game
+        self.near = near
+        self.mid = mid
+        self.interval = interval
+        self.frame = 0
+        self.counts = [0, 0, 0]  # actors per tier last frame
+        self.updates = 0  # sprite updates last frame
+
+    def view_distance(self, x, y):
+        """ distance of map point(s) (floats or arrays) outside the camera view, 0 if inside"""
+
+        left, top = -self.game.camera.rect.x, -self.game.camera.rect.y  # camera offset is negative of view position
+        dx = np.maximum(np.maximum(left - x, x - (left + SCREENWIDTH)), 0)
+        dy = np.maximum(np.maximum(top - y, y - (top + SCREENHEIGHT)), 0)
+        return np.maximum(dx, dy)
+
+    def tier(self, distance):
+        return np.where(distance <= self.near, NEAR, np.where(distance <= self.mid, MID, FAR))
+
+    def point_tier(self, x, y):
+        """ tier of a single map point e.g. bubble centre - plain arithmetic, as numpy calls on scalars cost more than
+        most sprites' whole update"""
+
+        left, top = -self.game.camera.rect.x, -self.game.camera.rect.y
+        distance = max(left - x, x - (left + SCREENWIDTH), top - y, y - (top + SCREENHEIGHT), 0)
+        return NEAR if distance <= self.near else MID if distance <= self.mid else FAR
+
+    def update(self):
+        """ update active sprites due this frame (replaces active_sprites.update())"""
+
+        game = self.game
+        store = game.mob_store
+        n = store.count
+        centre = np.floor(store.pos[:n] + 0.5) + store.half[:n]  # mob tiers from the store, all at once
+        mob_tiers = self.tier(self.view_distance(centre[:, 0], centre[:, 1]))
+        store.awake[:n] = mob_tiers != FAR  # sleeping mobs not moved
+        mob_tiers = mob_tiers.tolist()
+
+        counts = [0, 0, 0]
+        updates = 0
+        for i, sprite in enumerate(game.active_sprites.sprites()):
+            slot = getattr(sprite, 'slot', None)  # mobs have a mob_store slot
+            if slot is None:
+                tier = self.point_tier(*sprite.rect.center)
+            else:
+                tier = mob_tiers[slot]
+            counts[tier] += 1
+            if tier == FAR or (tier == MID and (self.frame + i) % self.interval):
+                continue
+
+            sprite.lod_tier = LODTIERS[tier]
+            if tier == NEAR:
+                sprite.update()
+            else:
+                # frames since last update, not caught up for time spent asleep (or before a new game)
+                sprite.update(max(1, min(self.frame - getattr(sprite, 'lod_frame', self.frame - 1), self.interval)))
+            sprite.lod_frame = self.frame
+            updates += 1
+
+        self.frame += 1
+        self.counts = counts
+        self.updates = updates
+
+    def stats(self):
+        stats = dict(zip(LODTIERS, self.counts))
+        stats['updates'] = self.updates
+        return stats
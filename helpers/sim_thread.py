@@ -0,0 +1,138 @@
+import threading
+from queue import Empty, SimpleQueue
+from time import perf_counter, sleep
+from settings import *
+
+# held while pygame works on a surface the other thread may be blitting (SDL fails a blit if either surface is locked,
+# e.g. by pygame.mask.from_surface or pygame.transform.rotate).  Main thread holds it while blitting the scene,
+# simulation thread only on cache misses e.g. first rotation of a mob frame
+surface_lock = threading.Lock()
+
+
+class RenderSnapshot:
+    """ Everything the main thread needs to draw one simulation tick, captured by the simulation thread.  Never
+    modified once published"""
+
+    __slots__ = ('time', 'camera', 'prev_camera', 'sprites', 'chunks', 'hud')
+
+    def __init__(self, time, camera, prev_camera, sprites, chunks, hud):
+
+        self.time = time  # perf_counter() when captured - render interpolation
+        self.camera = camera  # camera offset
+        self.prev_camera = prev_camera  # camera offset before the tick
+        self.sprites = sprites  # (layer, image, rect topleft, topleft before the tick or None) per sprite
+        self.chunks = chunks  # (static layer chunk surface, map position) of chunks in view
+        self.hud = hud  # debug text, see Game.hud_text
+
+
+class SnapshotBuffer:
+    """ Double buffer between the simulation and main threads.  The simulation thread builds the next snapshot (back
+    buffer) while the main thread draws the last one published (front buffer).  Publishing is a single reference
+    assignment - atomic under the GIL - so neither thread waits on a lock"""
+
+    def __init__(self):
+
+        self.front = None  # last snapshot published
+        self.published = 0  # written by simulation thread only
+        self.last_drawn = None  # read/ written by main thread only
+        self.drawn = 0  # snapshots drawn at least once
+        self.repeats = 0  # frames drawn from a snapshot already drawn (render faster than simulation)
+
+    def publish(self, snapshot):
+
+        self.front = snapshot
+        self.published += 1
+
+    def read(self):
+        """ latest snapshot for the main thread to draw, None before the first tick"""
+
+        snapshot = self.front
+        if snapshot is not None:
+            if snapshot is self.last_drawn:
+                self.repeats += 1
+            else:
+                self.drawn += 1
+                self.last_drawn = snapshot
+        return snapshot
+
+
+class SimThread:
+    """ Two thread mode (SIMTHREAD): game.update run at SIMRATE on a background thread, which publishes a
+    RenderSnapshot after every tick, while the main thread handles pygame events and draws the latest snapshot.  Input
+    which changes the simulation (e.g. firing) is handed to the simulation thread as commands"""
+
+    def __init__(self, game):
+
+        self.game = game
+        self.buffer = SnapshotBuffer()
+        self.commands = SimpleQueue()  # callables run on the simulation thread before its next tick
+        self.thread = None
+        self.running = False
+        self.error = None  # exception raised on the simulation thread, re-raised on the main thread by Game.run
+
+        # simulation thread timings (seconds)
+        self.ticks = 0
+        self.update_time = 0
+        self.snapshot_time = 0
+        self.sleep_time = 0
+
+    def start(self):
+
+        self.buffer = SnapshotBuffer()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def command(self, function):
+        self.commands.put(function)
+
+    def run(self):
+
+        game = self.game
+        next_tick = perf_counter()
+        try:
+            while self.running:
+                while True:
+                    try:
+                        self.commands.get_nowait()()
+                    except Empty:
+                        break
+
+                start = perf_counter()
+                game.prev_topleft = game.tick_topleft()
+                game.camera.prev_topleft = game.camera.rect.topleft
+                game.elapsed_time += game.dt
+                game.update()
+                game.spawn_pending(game.spawn_budget)
+                updated = perf_counter()
+                self.buffer.publish(game.snapshot())
+                end = perf_counter()
+                self.update_time += updated - start
+                self.snapshot_time += end - updated
+                self.ticks += 1
+
+                next_tick += game.dt
+                delay = next_tick - end
+                if delay > 0:
+                    sleep(delay)
+                    self.sleep_time += delay
+                elif delay < -MAXSIMSTEPS * game.dt:
+                    next_tick = end  # too far behind - drop backlog (game slows down) as Game.run
+        except Exception as error:
+            self.error = error
+            self.running = False
+
+    def stats(self):
+        """ per thread timings in milliseconds"""
+
+        ticks = max(1, self.ticks)
+        return {'ticks': self.ticks, 'update_ms': 1000 * self.update_time / ticks,
+                'snapshot_ms': 1000 * self.snapshot_time / ticks, 'sleep_ms': 1000 * self.sleep_time / ticks,
+                'published': self.buffer.published, 'drawn': self.buffer.drawn, 'repeats': self.buffer.repeats}
@@ -0,0 +1,110 @@
+from settings import *
+
+KEYSTRIDE = 1 << 16  # cell key = row * KEYSTRIDE + col (maps up to 65536 cells wide)
+
+
+class SpatialHash:
+    """ Uniform grid broadphase.  Map divided into square cells (GRIDSIZE) keyed by integer, each cell holding a list of
+    the sprites whose rect overlaps it.  query_rect() reuses a single result list so queries make no allocations.
+    rect_attr names the sprite rect indexed e.g. 'bounds' for mobs, whose rotated image is larger than their rect"""
+
+    def __init__(self, cellsize=GRIDSIZE, rect_attr='rect'):
+
+        self.cellsize = cellsize  # width/ height of a cell in pixels
+        self.rect_attr = rect_attr
+        self.cells = {}  # cell key: list of sprites overlapping cell
+        self.sprite_cells = {}  # sprite: (col1, row1, col2, row2) range of cells currently occupied by sprite
+        self.marks = {}  # sprite: id of last query returning sprite (sprites spanning several cells returned once)
+        self.query_id = 0
+        self.hits = []  # result of last query - overwritten by the next query so copy if needs to be kept
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite):
+        return sprite in self.sprite_cells
+
+    def clear(self):
+
+        self.cells.clear()
+        self.sprite_cells.clear()
+        self.marks.clear()
+
+    def cell_range(self, rect):
+        """ return (col1, row1, col2, row2) of the cells overlapped by rect"""
+        size = self.cellsize
+        return rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size
+
+    def add_to_cells(self, sprite, cell_range):
+
+        col1, row1, col2, row2 = cell_range
+        for row in range(row1, row2 + 1):
+            for col in range(col1, col2 + 1):
+                key = row * KEYSTRIDE + col
+                cell = self.cells.get(key)
+                if cell is None:
+                    self.cells[key] = cell = []
+                cell.append(sprite)
+
+    def remove_from_cells(self, sprite, cell_range):
+
+        col1, row1, col2, row2 = cell_range
+        for row in range(row1, row2 + 1):
+            for col in range(col1, col2 + 1):
+                key = row * KEYSTRIDE + col
+                cell = self.cells[key]
+                cell.remove(sprite)
+                if not cell:
+                    del self.cells[key]  # keep dictionary limited to occupied cells
+
+    def insert(self, sprite):
+
+        if sprite in self.sprite_cells:
+            self.move(sprite)
+            return
+        cell_range = self.cell_range(getattr(sprite, self.rect_attr))
+        self.sprite_cells[sprite] = cell_range
+        self.add_to_cells(sprite, cell_range)
+
+    def move(self, sprite):
+        """ call after sprite.rect has changed.  Nothing to do if sprite still overlaps the same cells"""
+
+        cell_range = self.cell_range(getattr(sprite, self.rect_attr))
+        old_range = self.sprite_cells.get(sprite)
+        if cell_range == old_range:
+            return
+        if old_range is not None:
+            self.remove_from_cells(sprite, old_range)
+        self.sprite_cells[sprite] = cell_range
+        self.add_to_cells(sprite, cell_range)
+
+    def remove(self, sprite):
+        """ safe to call for sprites not in the hash e.g. mob already removed when hit by player"""
+
+        cell_range = self.sprite_cells.pop(sprite, None)
+        if cell_range is not None:
+            self.remove_from_cells(sprite, cell_range)
+            self.marks.pop(sprite, None)
+
+    def query_rect(self, rect):
+        """ return list of sprites whose rect overlaps rect.  List is reused by the next query"""
+
+        rect_attr = self.rect_attr
+        self.query_id += 1
+        query_id = self.query_id
+        cells = self.cells
+        marks = self.marks
+        hits = self.hits
+        hits.clear()
+
+        size = self.cellsize
+        for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for col in range(rect.left // size, (rect.right - 1) // size + 1):
+                cell = cells.get(row * KEYSTRIDE + col)
+                if cell is None:
+                    continue
+                for sprite in cell:
+                    if marks.get(sprite) != query_id and rect.colliderect(getattr(sprite, rect_attr)):
+                        marks[sprite] = query_id
+                        hits.append(sprite)
+        return hits
@@ -0,0 +1,37 @@
+class SpritePool:
+    """ Fixed capacity pool of reusable sprites e.g. missiles.  All sprites created up front so sustained firing makes no
+    allocations; spent sprites returned with release() are reused by acquire()"""
+
+    def __init__(self, factory, capacity):
+
+        self.capacity = capacity
+        self.sprites = [factory() for i in range(capacity)]
+        self.free = list(self.sprites)  # sprites ready for reuse
+        self.in_use = 0
+        self.high_water = 0  # most sprites in use at once - tune capacity with this
+        self.exhausted = 0  # acquire() calls refused because every sprite in use
+
+    def acquire(self):
+        """ return a spent sprite, or None if every sprite in the pool is in use"""
+
+        if not self.free:
+            self.exhausted += 1
+            return None
+        self.in_use += 1
+        self.high_water = max(self.high_water, self.in_use)
+        return self.free.pop()
+
+    def release(self, sprite):
+        """ return spent sprite to the pool.  Sprite should already be removed from its sprite groups"""
+
+        self.in_use -= 1
+        self.free.append(sprite)
+
+    def reset(self):
+        """ return every sprite to the pool e.g. new game.  Sprites should already be removed from their sprite groups"""
+
+        self.free = list(self.sprites)
+        self.in_use = 0
+
+    def stats(self):
+        return {'capacity': self.capacity, 'in_use': self.in_use, 'high_water': self.high_water, 'exhausted': self.exhausted}
@@ -28,29 +28,29 @@ class SpriteSheet:
             tree = ET.parse(self.xmlfile)
             images = {}
             for node in tree.iter():
-                for cat in list(spritedata.keys()):
-                    if node.attrib.get('SPRITECATEGORY') == cat:
-                        spritecategory = node.attrib.get('SPRITECATEGORY')
-                        x = int(node.attrib.get('X'))
-                        y = int(node.attrib.get('Y'))
-                        width = int(node.attrib.get('WIDTH'))
-                        height = int(node.attrib.get('HEIGHT'))
-                        img = self.get_image(x, y, width, height)
-                        new_width = spritedata[cat]['width'] * TILESIZE
-                        new_height = spritedata[cat]['height'] * TILESIZE
-                        img = pygame.transform.scale(img, (new_width, new_height))  # resize image
+                cat = node.attrib.get('SPRITECATEGORY')
+                if cat in spritedata:  # single dictionary lookup per node rather than comparing every category
+                    spritecategory = cat
+                    x = int(node.attrib.get('X'))
+                    y = int(node.attrib.get('Y'))
+                    width = int(node.attrib.get('WIDTH'))
+                    height = int(node.attrib.get('HEIGHT'))
+                    img = self.get_image(x, y, width, height)
+                    new_width = spritedata[cat]['width'] * TILESIZE
+                    new_height = spritedata[cat]['height'] * TILESIZE
+                    img = pygame.transform.scale(img, (new_width, new_height))  # resize image
 
-                        if node.attrib.get('SUBCAT'):
-                            subcat = node.attrib.get('SUBCAT')
-                            if spritecategory not in images:
-                                images[spritecategory] = {}
-                            if subcat not in images[spritecategory]:
-                                images[spritecategory][subcat] = []
-                            images[spritecategory][subcat].append(img)
-                        else:
-                            if spritecategory not in images:
-                                images[spritecategory] = []
-                            images[spritecategory].append(img)
+                    if node.attrib.get('SUBCAT'):
+                        subcat = node.attrib.get('SUBCAT')
+                        if spritecategory not in images:
+                            images[spritecategory] = {}
+                        if subcat not in images[spritecategory]:
+                            images[spritecategory][subcat] = []
+                        images[spritecategory][subcat].append(img)
+                    else:
+                        if spritecategory not in images:
+                            images[spritecategory] = []
+                        images[spritecategory].append(img)
         return images
 
 
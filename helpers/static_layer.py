@@ -0,0 +1,98 @@
+import pygame
+from settings import *
+from helpers.sim_thread import surface_lock
+
+
+class StaticLayer:
+    """ Non-moving sprites (platforms, background props) baked into chunk surfaces once per map load.  Only chunks
+    overlapping the camera rect are blitted each frame - draw cost depends on screen size rather than map size"""
+
+    def __init__(self, game, chunksize=LAYERCHUNKSIZE):
+
+        self.game = game
+        self.chunksize = chunksize  # width/ height of a chunk in pixels
+        self.chunks = {}  # (chunk_col, chunk_row): Surface.  Chunks without any static sprites are never created
+
+    def get_chunk(self, chunk_col, chunk_row):
+        """ return chunk surface, creating a blank (transparent) one if not yet baked"""
+
+        key = (chunk_col, chunk_row)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = pygame.Surface((self.chunksize, self.chunksize)).convert()
+            chunk.fill(BLACK)
+            chunk.set_colorkey(BLACK, pygame.RLEACCEL)  # sprite images use BLACK as colorkey so same transparency applies
+            self.chunks[key] = chunk
+        return chunk
+
+    def bake(self, sprites, tiles=None):
+        """ blit platform tiles (game.tiles TileStore) then every sprite image into the chunk(s) it overlaps e.g. a
+        monument (8 X 6 TILES) may span 4 chunks"""
+
+        self.chunks = {}
+        if tiles:
+            self.blit_tiles(tiles, 0, 0, tiles.cols - 1, tiles.rows - 1)
+        for sprite in sprites:
+            self.blit_sprite(sprite)
+
+    def blit(self, image, rect):
+
+        size = self.chunksize
+        for chunk_row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for chunk_col in range(rect.left // size, (rect.right - 1) // size + 1):
+                chunk = self.get_chunk(chunk_col, chunk_row)
+                with surface_lock:  # chunk may be being drawn (SIMTHREAD)
+                    chunk.blit(image, (rect.x - chunk_col*size, rect.y - chunk_row*size))
+                if self.game.governor:
+                    self.game.governor.discard(chunk)  # scaled copy out of date
+
+    def blit_sprite(self, sprite):
+        self.blit(sprite.image, sprite.rect)
+
+    def blit_tiles(self, tiles, col1, row1, col2, row2):
+        """ blit platforms from TileStore tiles in tile range (inclusive)"""
+
+        for col, row, image in tiles.tiles(col1, row1, col2, row2):
+            self.blit(image, pygame.Rect((col*TILESIZE, row*TILESIZE), image.get_size()))
+
+    def region_keys(self, rect):
+        """ keys of chunks inside rect (map position, aligned to chunk size)"""
+
+        size = self.chunksize
+        return [(chunk_col, chunk_row) for chunk_row in range(rect.top // size, rect.bottom // size)
+                for chunk_col in range(rect.left // size, rect.right // size)]
+
+    def drop_region(self, rect):
+        """ free chunks inside rect e.g. map chunk evicted (MAPSTREAMING)"""
+
+        for key in self.region_keys(rect):
+            self.chunks.pop(key, None)
+
+    def bake_region(self, rect, sprites, tiles=None):
+        """ rebake chunks inside rect from platform tiles within rect and sprites overlapping rect.  Sprites overhanging
+        rect also blitted into neighbouring chunks"""
+
+        self.drop_region(rect)
+        if tiles:
+            self.blit_tiles(tiles, max(0, rect.left // TILESIZE), max(0, rect.top // TILESIZE),
+                            min(tiles.cols, rect.right // TILESIZE) - 1, min(tiles.rows, rect.bottom // TILESIZE) - 1)
+        for sprite in sprites:
+            self.blit_sprite(sprite)
+
+    def visible_chunks(self, camera_rect, margin=0):
+        """ yield (chunk surface, screen position) for chunks overlapping the camera view widened by margin pixels"""
+
+        size = self.chunksize
+        view_x, view_y = -camera_rect.x - margin, -camera_rect.y - margin  # camera offset is negative of view position
+        for chunk_row in range(view_y // size, (view_y + SCREENHEIGHT + 2*margin - 1) // size + 1):
+            for chunk_col in range(view_x // size, (view_x + SCREENWIDTH + 2*margin - 1) // size + 1):
+                chunk = self.chunks.get((chunk_col, chunk_row))
+                if chunk is not None:
+                    yield chunk, (chunk_col*size + camera_rect.x, chunk_row*size + camera_rect.y)
+
+    def draw(self, queue, area=None):
+        """ queue visible chunks on the platforms layer.  area - only chunks overlapping area (screen position)"""
+
+        for chunk, screenpos in self.visible_chunks(self.game.camera.rect):
+            if area is None or area.colliderect(chunk.get_rect(topleft=screenpos)):
+                queue.add('platforms', chunk, screenpos)
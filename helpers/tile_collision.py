@@ -0,0 +1,143 @@
+from math import ceil, floor, inf
+from settings import *
+
+NONSOLID = ('tunnelLeft', 'tunnelRight')  # platform types sprites can pass through (tunnel entrances)
+# map character code: 1 if solid platform - translates a row of map characters to solidity in one call
+SOLIDTABLE = bytes(1 if PLATFORMKEY.get(chr(i)) and PLATFORMKEY[chr(i)] not in NONSOLID else 0 for i in range(256))
+
+
+class SolidGrid:
+    """ Compact solidity grid built from map rows and PLATFORMKEY: one byte per tile, 1 == solid platform.
+    Collision checks index only the tiles under a rect - no sprites involved"""
+
+    def __init__(self, cols, rows):
+
+        self.cols = cols
+        self.rows = rows
+        self.tiles = bytearray(self.cols * self.rows)  # row major, empty until filled from map data
+        self.changes = 0  # incremented by fill/ clear e.g. so the mob flow field is recomputed
+
+    def fill(self, col1, row1, mapdata):
+        """ set solidity of tiles from rows of map characters (str, or bytes e.g. MappedMap.byte_rows) with top left
+        tile at (col1, row1)"""
+
+        self.changes += 1
+        for row, tiles in enumerate(mapdata, row1):
+            if isinstance(tiles, str):
+                tiles = tiles.encode('ascii')
+            offset = row*self.cols + col1
+            self.tiles[offset:offset + len(tiles)] = tiles.translate(SOLIDTABLE)
+
+        # map boundary handled by Mobile_sprite.atMapBoundaries
+        row2 = row1 + len(mapdata) - 1
+        col2 = col1 + len(mapdata[0]) - 1 if mapdata else col1
+        for row in (0, self.rows - 1):
+            if row1 <= row <= row2:
+                self.clear(col1, row, col2, row)
+        for col in (0, self.cols - 1):
+            if col1 <= col <= col2:
+                for row in range(row1, row2 + 1):
+                    self.tiles[row*self.cols + col] = 0
+
+    def clear(self, col1, row1, col2, row2):
+        """ mark tiles non-solid e.g. map chunk evicted"""
+        self.changes += 1
+
+        for row in range(row1, row2 + 1):
+            offset = row * self.cols
+            self.tiles[offset + col1:offset + col2 + 1] = bytes(col2 - col1 + 1)
+
+    def is_solid(self, col, row):
+
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.tiles[row*self.cols + col] == 1
+        return False
+
+    def tile_span(self, rect):
+        """ return (col1, row1, col2, row2) of the tiles under rect, limited to the map"""
+
+        col1 = max(0, rect.left // TILESIZE)
+        row1 = max(0, rect.top // TILESIZE)
+        col2 = min(self.cols - 1, (rect.right - 1) // TILESIZE)
+        row2 = min(self.rows - 1, (rect.bottom - 1) // TILESIZE)
+        return col1, row1, col2, row2
+
+    def collide_rect(self, rect):
+        """ True if any solid tile under rect"""
+
+        col1, row1, col2, row2 = self.tile_span(rect)
+        tiles, cols = self.tiles, self.cols
+        for row in range(row1, row2 + 1):
+            offset = row * cols
+            for col in range(col1, col2 + 1):
+                if tiles[offset + col]:
+                    return True
+        return False
+
+    def resolve_axis(self, rect, axis, direction):
+        """ return new rect position along axis (x = 0, y = 1) placing rect against the first solid tile met in the
+        direction of travel (-1, 1), or None if rect overlaps no solid tiles"""
+
+        col1, row1, col2, row2 = self.tile_span(rect)
+        tiles, cols = self.tiles, self.cols
+
+        if axis == 0:
+            scan = range(col1, col2 + 1) if direction > 0 else range(col2, col1 - 1, -1)  # nearest column first
+            for col in scan:
+                for row in range(row1, row2 + 1):
+                    if tiles[row*cols + col]:
+                        return col*TILESIZE - rect.width if direction > 0 else (col + 1)*TILESIZE
+        else:
+            scan = range(row1, row2 + 1) if direction > 0 else range(row2, row1 - 1, -1)
+            for row in scan:
+                offset = row * cols
+                for col in range(col1, col2 + 1):
+                    if tiles[offset + col]:
+                        return row*TILESIZE - rect.height if direction > 0 else (row + 1)*TILESIZE
+        return None
+
+    def sweep(self, box, dx, dy):
+        """ swept collision of box (left, top, width, height) moving (dx, dy) through the grid.  Return
+        (time of impact 0 - 1, col, row, axis) of the first solid tile entered, or None.  Walks the grid one tile
+        boundary at a time (DDA) so cost depends on tiles crossed, not speed - no tunnelling through thin walls"""
+
+        left, top, width, height = box
+        for row in range(floor(top / TILESIZE), ceil((top + height) / TILESIZE)):
+            for col in range(floor(left / TILESIZE), ceil((left + width) / TILESIZE)):
+                if self.is_solid(col, row):
+                    return 0.0, col, row, None  # already overlapping solid tile
+
+        # next column/ row boundary crossed by leading edge, time to reach it and time between boundaries
+        if dx > 0:
+            step_col, col = 1, ceil((left + width) / TILESIZE)
+            t_col, dt_col = (col*TILESIZE - left - width) / dx, TILESIZE / dx
+        elif dx < 0:
+            step_col, col = -1, floor(left / TILESIZE) - 1
+            t_col, dt_col = (left - (col + 1)*TILESIZE) / -dx, TILESIZE / -dx
+        else:
+            t_col = inf
+        if dy > 0:
+            step_row, row = 1, ceil((top + height) / TILESIZE)
+            t_row, dt_row = (row*TILESIZE - top - height) / dy, TILESIZE / dy
+        elif dy < 0:
+            step_row, row = -1, floor(top / TILESIZE) - 1
+            t_row, dt_row = (top - (row + 1)*TILESIZE) / -dy, TILESIZE / -dy
+        else:
+            t_row = inf
+
+        while min(t_col, t_row) <= 1:
+            if t_col <= t_row:  # leading edge enters column col: check rows covered by box at that time
+                y = top + dy*t_col
+                for hit_row in range(floor(y / TILESIZE), ceil((y + height) / TILESIZE)):
+                    if self.is_solid(col, hit_row):
+                        return t_col, col, hit_row, 0
+                col += step_col
+                t_col += dt_col
+            else:  # leading edge enters row row
+                x = left + dx*t_row
+                for hit_col in range(floor(x / TILESIZE), ceil((x + width) / TILESIZE)):
+                    if self.is_solid(hit_col, row):
+                        return t_row, hit_col, row, 1
+                row += step_row
+                t_row += dt_row
+        return None
@@ -0,0 +1,73 @@
+from settings import *
+
+PLATFORMTYPES = tuple(PLATFORMKEY.values())  # platform type id - 1: platform type e.g. 'roof'
+PLATFORMIDS = {platform_type: type_id for type_id, platform_type in enumerate(PLATFORMTYPES, 1)}
+PLATFORMTABLE = bytes(1 if chr(i) in PLATFORMKEY else 0 for i in range(256))  # map character code: 1 if platform
+
+
+def platform_cols(tiles):
+    """ yield columns of platform characters in a row of map character bytes"""
+
+    mask = tiles.translate(PLATFORMTABLE)
+    col = mask.find(1)
+    while col != -1:
+        yield col
+        col = mask.find(1, col + 1)
+
+
+class TileRecord:
+    """ Platform tile indexed in game.platform_hash when COLLISIONMODE == 'sprites' - only the rect collision code
+    reads, no sprite per tile"""
+
+    __slots__ = ('rect', 'refkey')
+
+    def __init__(self, rect, refkey):
+
+        self.rect = rect
+        self.refkey = refkey
+
+
+class TileStore:
+    """ Platform tiles from map data in two parallel byte arrays, one byte each per map tile: platform type id (0 ==
+    no platform, see PLATFORMTYPES) and image variant (index into game.platform_images[platform type]).  Platforms are
+    baked into the static layer from here - there is no sprite per tile"""
+
+    def __init__(self, cols, rows, platform_images):
+
+        self.cols = cols
+        self.rows = rows
+        self.types = bytearray(cols * rows)  # row major
+        self.variants = bytearray(cols * rows)
+        self.images = [platform_images[platform_type] for platform_type in PLATFORMTYPES]  # type id - 1: image variants
+
+    def set(self, col, row, platform_type, variant):
+
+        index = row*self.cols + col
+        self.types[index] = PLATFORMIDS[platform_type]
+        self.variants[index] = variant
+
+    def platform_type(self, col, row):
+        """ platform type at (col, row), None if no platform"""
+
+        type_id = self.types[row*self.cols + col]
+        return PLATFORMTYPES[type_id - 1] if type_id else None
+
+    def clear(self, col1, row1, col2, row2):
+        """ remove platforms in tile range (inclusive) e.g. map chunk evicted"""
+
+        for row in range(row1, row2 + 1):
+            offset = row * self.cols
+            self.types[offset + col1:offset + col2 + 1] = bytes(col2 - col1 + 1)
+
+    def tiles(self, col1, row1, col2, row2):
+        """ yield (col, row, image) of platforms in tile range (inclusive)"""
+
+        images, variants = self.images, self.variants
+        for row in range(row1, row2 + 1):
+            offset = row * self.cols
+            for col, type_id in enumerate(self.types[offset + col1:offset + col2 + 1], col1):
+                if type_id:
+                    yield col, row, images[type_id - 1][variants[offset + col]]
+
+    def nbytes(self):
+        return len(self.types) + len(self.variants)
@@ -0,0 +1,93 @@
+from settings import *
+
+
+class Timer:
+    """ callback scheduled on a TimerWheel.  Returned by TimerWheel.schedule for cancelling"""
+
+    __slots__ = ('due', 'interval', 'callback', 'cancelled')
+
+    def __init__(self, due, interval, callback):
+
+        self.due = due  # wheel tick to fire on
+        self.interval = interval  # ticks between repeats, 0 for one shot
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerWheel:
+    """ Hierarchical timer wheel: one shot and repeating callbacks counted in simulation ticks (1 / SIMRATE s).  Level 0
+    has a slot per tick for the next WHEELSLOTS ticks, each higher level a slot per WHEELSLOTS ticks of the level below;
+    timers cascade down a level as their slot comes round.  advance() costs O(timers expiring) rather than O(timers)"""
+
+    def __init__(self, tick=1 / SIMRATE, slots=WHEELSLOTS, levels=WHEELLEVELS):
+
+        self.tick = tick  # seconds
+        self.slots = slots
+        self.now = 0  # ticks advanced
+        self.remainder = 0  # time advanced not yet a whole tick
+        self.wheels = [[[] for slot in range(slots)] for level in range(levels)]
+        self.spans = [slots ** level for level in range(levels + 1)]  # ticks per slot at each level, wheel span at top
+        self.overflow = []  # timers due beyond the top wheel, re-placed each time it turns
+
+    @property
+    def time(self):
+        """ seconds advanced - clock for animations (see Static_sprite.animate)"""
+        return self.now * self.tick
+
+    def schedule(self, delay, callback, repeat=False):
+        """ call callback() after delay seconds (at least one tick), every delay seconds if repeat.  Return Timer"""
+
+        ticks = max(1, round(delay / self.tick))
+        timer = Timer(self.now + ticks, ticks if repeat else 0, callback)
+        self.place(timer)
+        return timer
+
+    def cancel(self, timer):
+        """ cancelled timers are dropped when their slot comes round"""
+        if timer is not None:
+            timer.cancelled = True
+
+    def place(self, timer):
+
+        ticks = timer.due - self.now
+        for level, wheel in enumerate(self.wheels):
+            if ticks < self.spans[level + 1]:
+                wheel[(timer.due // self.spans[level]) % self.slots].append(timer)
+                return
+        self.overflow.append(timer)
+
+    def advance(self, dt):
+        """ advance dt seconds, firing timers due"""
+
+        self.remainder += dt
+        while self.remainder >= self.tick - 1e-9:  # tolerance so a fixed timestep of one tick always advances one tick
+            self.remainder -= self.tick
+            self.step()
+
+    def step(self):
+
+        self.now += 1
+        now = self.now
+        for level in range(1, len(self.wheels) + 1):  # cascade higher levels whose slot has come round
+            if now % self.spans[level]:
+                break
+            if level == len(self.wheels):
+                timers, self.overflow = self.overflow, []
+            else:
+                wheel = self.wheels[level]
+                index = (now // self.spans[level]) % self.slots
+                timers, wheel[index] = wheel[index], []
+            for timer in timers:
+                if not timer.cancelled:
+                    self.place(timer)
+
+        wheel = self.wheels[0]
+        index = now % self.slots
+        timers, wheel[index] = wheel[index], []
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            timer.callback()
+            if timer.interval and not timer.cancelled:
+                timer.due += timer.interval
+                self.place(timer)
@@ -0,0 +1,145 @@
+import random
+import pygame
+from settings import *
+
+
+class WorldChunk:
+    """ Square chunk of the map (STREAMCHUNKTILES X STREAMCHUNKTILES): the sprites created when the chunk was loaded,
+    killed again when it is evicted"""
+
+    def __init__(self, chunk_col, chunk_row, chunktiles):
+
+        self.key = (chunk_col, chunk_row)
+        self.col1 = chunk_col * chunktiles  # top left tile
+        self.row1 = chunk_row * chunktiles
+        self.rect = pygame.Rect(self.col1*TILESIZE, self.row1*TILESIZE, chunktiles*TILESIZE, chunktiles*TILESIZE)
+        self.static_sprites = []  # props - baked into game.static_layer with the chunk's platform tiles
+        self.tile_records = []  # platform tiles in game.platform_hash (COLLISIONMODE == 'sprites')
+        self.active_sprites = []  # bubbles
+        self.spawnpoints = []  # floor tiles within chunk
+
+
+class ChunkedWorld:
+    """ Map loaded in chunks (MAPSTREAMING).  Chunks within STREAMMARGIN chunks of the camera view are read from the
+    map, their sprites created and indexed; chunks left further behind are evicted.  Startup time and memory depend on
+    screen size rather than map size"""
+
+    def __init__(self, game, chunktiles=STREAMCHUNKTILES, margin=STREAMMARGIN):
+
+        self.game = game
+        self.chunktiles = chunktiles
+        self.chunksize = chunktiles * TILESIZE  # pixels
+        self.margin = margin
+        self.chunks = {}  # (chunk_col, chunk_row): WorldChunk
+        self.seed = random.getrandbits(32)  # chunk contents seeded from (seed, chunk) so a reloaded chunk looks the same
+
+        self.mob_spawns = {}  # 'E' tile (col, row): mob spawned from tile
+        self.dead_spawns = set()  # 'E' tiles whose mob has been killed - never respawned
+        self.loads = 0
+        self.evictions = 0
+
+    def chunk_rng(self, chunk_col, chunk_row, stream):
+        # str seed (hashed with SHA-512) is the same in every process - hash() of a str is salted per process
+        return random.Random('{}:{}:{}:{}'.format(self.seed, chunk_col, chunk_row, stream))
+
+    def view_range(self, margin):
+        """ return (col1, row1, col2, row2) of chunks within margin chunks of the camera view, limited to the map"""
+
+        size = self.chunksize
+        view_x, view_y = -self.game.camera.rect.x, -self.game.camera.rect.y
+        col1 = max(0, view_x // size - margin)
+        row1 = max(0, view_y // size - margin)
+        col2 = min((self.game.map.cols - 1) // self.chunktiles, (view_x + SCREENWIDTH - 1) // size + margin)
+        row2 = min((self.game.map.rows - 1) // self.chunktiles, (view_y + SCREENHEIGHT - 1) // size + margin)
+        return col1, row1, col2, row2
+
+    def update(self):
+        """ load chunks coming within margin of the view, evict chunks over margin + 1 chunks away (hysteresis so
+        chunks on the boundary are not repeatedly loaded and evicted)"""
+
+        col1, row1, col2, row2 = self.view_range(self.margin)
+        for chunk_row in range(row1, row2 + 1):
+            for chunk_col in range(col1, col2 + 1):
+                if (chunk_col, chunk_row) not in self.chunks:
+                    self.load(chunk_col, chunk_row)
+
+        col1, row1, col2, row2 = self.view_range(self.margin + 1)
+        for key in [key for key in self.chunks if not (col1 <= key[0] <= col2 and row1 <= key[1] <= row2)]:
+            self.evict(key)
+
+    def load(self, chunk_col, chunk_row):
+
+        game = self.game
+        chunk = WorldChunk(chunk_col, chunk_row, self.chunktiles)
+        col2 = min(chunk.col1 + self.chunktiles, game.map.cols) - 1
+        row2 = min(chunk.row1 + self.chunktiles, game.map.rows) - 1
+        rng = self.chunk_rng(chunk_col, chunk_row, 'tiles')
+        mob_rng = self.chunk_rng(chunk_col, chunk_row, 'mobs')  # separate so skipped mobs don't change platform images
+
+        tiles = game.map.region(chunk.col1, chunk.row1, col2, row2)
+        for row, rowtiles in enumerate(tiles, chunk.row1):
+            for col, tile in enumerate(rowtiles, chunk.col1):
+                record = game.load_tile(col, row, tile, chunk.spawnpoints, rng)
+                if record:
+                    chunk.tile_records.append(record)
+        for tile, col, row in game.map.spawns(chunk.col1, chunk.row1, col2, row2):
+            if self.respawn_mob((col, row)):
+                self.mob_spawns[(col, row)] = game.spawn_entity(col, row, tile, mob_rng)
+        game.solid_grid.fill(chunk.col1, chunk.row1, tiles)
+
+        for sprite in game.generate_environment(chunk.spawnpoints, rng):
+            if game.static_sprites.has(sprite):
+                chunk.static_sprites.append(sprite)
+            else:
+                chunk.active_sprites.append(sprite)
+        self.chunks[chunk.key] = chunk
+
+        # bake static layer for chunk, including props of loaded neighbours overhanging chunk (e.g. tall props)
+        overlapping = []
+        for neighbour_row in range(chunk_row - 1, chunk_row + 2):
+            for neighbour_col in range(chunk_col - 1, chunk_col + 2):
+                neighbour = self.chunks.get((neighbour_col, neighbour_row))
+                if neighbour:
+                    overlapping += [sprite for sprite in neighbour.static_sprites if sprite.rect.colliderect(chunk.rect)]
+        game.static_layer.bake_region(chunk.rect, overlapping, game.tiles)
+        self.loads += 1
+
+    def respawn_mob(self, tile):
+        """ True if mob should be spawned from 'E' tile: never killed and not still roaming from an earlier load"""
+
+        if tile in self.dead_spawns:
+            return False
+        mob = self.mob_spawns.get(tile)
+        if mob is None:
+            return True
+        if not mob.alive():  # killed since last checked
+            self.dead_spawns.add(tile)
+            del self.mob_spawns[tile]
+        return False
+
+    def evict(self, key):
+
+        game = self.game
+        chunk = self.chunks.pop(key)
+        for sprite in chunk.static_sprites + chunk.active_sprites:
+            sprite.kill()
+        for record in chunk.tile_records:
+            game.platform_hash.remove(record)
+
+        # mobs within chunk despawned, respawned from their 'E' tile when that chunk is next loaded
+        for tile, mob in list(self.mob_spawns.items()):
+            if not mob.alive():  # killed since last checked
+                self.dead_spawns.add(tile)
+                del self.mob_spawns[tile]
+            elif chunk.rect.collidepoint(mob.rect.center):
+                mob.kill()
+                del self.mob_spawns[tile]
+                if mob.dead:  # hit by player - not brought back
+                    self.dead_spawns.add(tile)
+
+        col2 = min(chunk.col1 + self.chunktiles, game.map.cols) - 1
+        row2 = min(chunk.row1 + self.chunktiles, game.map.rows) - 1
+        game.solid_grid.clear(chunk.col1, chunk.row1, col2, row2)
+        game.tiles.clear(chunk.col1, chunk.row1, col2, row2)
+        game.static_layer.drop_region(chunk.rect)
+        self.evictions += 1
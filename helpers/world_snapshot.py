@@ -0,0 +1,50 @@
+import numpy as np
+from settings import *
+
+
+class WorldSnapshot:
+    """ Pristine state of the world captured once, after the first map load, so later games start with a warm restart
+    (see Game.new): nothing re-read from the map or re-created.  Platform tiles, the baked static layer and props never
+    change during play so are simply kept; mobs and bubbles are put back from compact saved arrays.  Not used with
+    MAPSTREAMING - chunks are loaded and evicted as the camera moves"""
+
+    def __init__(self, game):
+
+        self.mob_state = game.mob_store.save()  # mob store arrays and slots as loaded from map data
+        self.props = []  # static sprites spawned by game.spawner
+        self.bubbles = []
+        self.bubble_pos = []  # spawn position per bubble, numpy array once complete
+        self.complete = False  # True once the environment has finished spawning
+
+    def add(self, sprite, static):
+        """ record sprite spawned by game.spawner (see Game.spawn_pending)"""
+
+        if static:
+            self.props.append(sprite)
+        else:
+            self.bubbles.append(sprite)
+            self.bubble_pos.append(tuple(sprite.pos))
+
+    def finish(self):
+
+        self.bubble_pos = np.array(self.bubble_pos, float).reshape(-1, 2)
+        self.complete = True
+
+    def restore(self, game):
+        """ put mobs, bubbles and props back into game's (empty) sprite groups and indexes, as captured"""
+
+        store = game.mob_store
+        store.restore(self.mob_state)
+        for slot, mob in enumerate(store.mobs):
+            if mob is not None:
+                mob.reset(slot)
+                game.mob_sprites.add(mob)
+                game.mob_hash.insert(mob)
+                game.active_sprites.add(mob)
+                game.all_sprites.add(mob)
+
+        game.static_sprites.add(self.props)  # already baked into game.static_layer
+        for bubble, pos in zip(self.bubbles, self.bubble_pos.tolist()):
+            bubble.reset(pos)
+            game.all_sprites.add(bubble)
+            game.unindexed_sprites.add(bubble)
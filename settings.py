@@ -14,10 +14,48 @@ repos = r"C:\Users\ben_s\Documents\Python_Scripts\PROJECTS\SideScrollerUnderwate
 # game options/settings
 TITLE = "Animate player"
 TILESIZE = 36  # length, width in pixels
-GRIDWIDTH, GRIDHEIGHT = 4*TILESIZE, 4*TILESIZE  # map divided into grids 4 X 4 TILES
+GRIDSIZE = 4*TILESIZE  # map divided into spatial hash cells 4 X 4 TILES for collision broadphase
+ROTATIONSTEPS = 64  # mob rotation angles quantized to 360/64 deg buckets (see helpers/image_cache.py)
+ROTATIONCACHEBYTES = 32 * 1024 * 1024  # memory cap for cached rotated mob images
+MISSILEPOOLSIZE = 32  # missiles in flight or stuck in walls at once (oldest stuck missile recycled when pool empty)
+COLLISIONMODE = 'tiles'  # platform collisions: 'tiles' - solidity grid from map data, 'sprites' - platform sprites in spatial hash
+FLOWFIELDRADIUS = 24  # tiles around the player searched for mob pathfinding (mobs chase within 20 TILES)
 SCREENWIDTH = 40 * TILESIZE  # screen width in tiles (must be divisible by 4)
 SCREENHEIGHT = 20 * TILESIZE  # screen height in tiles (must be divisible by 4)
-FPS = 60
+FPS = 60  # render frame rate cap (0 - uncapped)
+SIMRATE = 60  # simulation ticks per second - fixed timestep, game speed independent of frame rate
+MAXSIMSTEPS = 5  # most simulation ticks run to catch up per rendered frame, further backlog dropped (game slows down)
+SPAWNBUDGET = 0.002  # seconds per frame spent spawning props and bubbles after a new game starts
+SIMTHREAD = False  # simulation on a background thread, main thread only handles events and draws (see helpers/sim_thread.py)
+WHEELSLOTS = 64  # timer wheel (see helpers/timer_wheel.py) slots per level - level 0 covers 64 ticks, level 1 4096 ..
+WHEELLEVELS = 3
+LAYERCHUNKSIZE = 8*TILESIZE  # static platforms/ props baked into chunk surfaces 8 X 8 TILES
+RENDERMODE = 'full'  # 'full' - redraw whole screen every frame, 'dirty' - redraw changed areas only while camera still
+DIRTYFULLREDRAW = 0.5  # dirty rendering: full redraw once changed areas cover this fraction of the screen
+RENDERLAYERS = ('background', 'props', 'platforms', 'mobs', 'player', 'projectiles', 'effects')  # draw order, back to front
+
+# Dynamic resolution scaling (see helpers/resolution.py) - full redraw rendering only
+RESOLUTIONSCALING = True  # render world at reduced resolution and scale up to the screen while frames run over budget
+RESOLUTIONSCALES = (1, 0.75, 0.5)  # render scales stepped through, full resolution first
+RESOLUTIONWINDOW = 60  # frames averaged before the render scale is changed (and again after every change)
+RESOLUTIONHIGH = 0.9  # step down a scale when mean frame time is over this fraction of the frame budget (1 / FPS)
+RESOLUTIONLOW = 0.5  # step back up a scale when under this fraction
+
+# Simulation level of detail (see helpers/sim_lod.py) - by distance of actors outside the camera view
+LODTIERS = ('near', 'mid', 'far')
+LODNEAR = 4*TILESIZE  # updated every frame
+LODMID = 24*TILESIZE  # updated every LODMIDINTERVAL frames without image transform.  Further actors sleep
+LODMIDINTERVAL = 4
+
+# Map
+MAPFILE = path.join(repos, 'map.txt')  # text map, or compiled map (COMPILEDMAPEXT) see helpers/map_format.py
+COMPILEDMAPEXT = '.ssumap'
+MAPSTREAMING = False  # load map in chunks around the camera (very large maps) rather than all at once on Game.new()
+STREAMCHUNKTILES = 16  # streamed chunk width/ height in tiles (multiple of LAYERCHUNKSIZE)
+STREAMMARGIN = 1  # chunks loaded beyond camera view.  Evicted once further than STREAMMARGIN + 1 chunks from view
+
+# baked spritesheet images (see helpers/asset_cache.py) - rebuilt automatically when spritesheets/ spritedata change
+ASSETCACHE = path.join(repos, 'cache', 'assets.bin')
 
 # Background
 BACKGROUND = path.join(repos, "Images", "UnderwaterBackground.png")
@@ -1,15 +1,25 @@
 import pygame
-from math import fabs, floor
+from math import ceil, fabs, floor
 from math import sqrt as sqrt
 from random import choice, randrange
 from settings import *
 from helpers.spritesheet_functions import *
+from helpers.swept_collision import *
 
 vec = pygame.Vector2  # 2D vector - x = vec.x  y = vec.y
 
+# collision callables created once rather than on every collision check
+collide_pickup_ratio = pygame.sprite.collide_rect_ratio(0.5)
+missile_hitbox_ratio = 0.8  # missile hitbox against platforms (swept, see Missile.update)
+mob_hitbox_ratio = 0.7  # player, missile and mob hitboxes against each other before mask test (see game.masks)
+mask_sweep_step = 4  # pixels travelled by missile between mask tests against a mob (see Missile.sweep_mask)
+
 
 class Static_sprite(pygame.sprite.Sprite):
     """Don't have velocity though may be animated"""
+
+    layer = 'props'  # render queue layer, see RENDERLAYERS
+
     def __init__(self, game, col, row, refkey, image):
 
         pygame.sprite.Sprite.__init__(self)
@@ -20,18 +30,25 @@ class Static_sprite(pygame.sprite.Sprite):
         # self.rect = pygame.Rect(0, 0, width, height)
         self.rect = image.get_rect()
         self.rect.topleft = self.pos
+        self.clip = None  # animation clip playing, see play
+        self.anim_start = game.timers.now  # tick animation started
 
-    def animate(self, time_period, anim_reel):
+    def play(self, clip, on_end=None):
+        """ start playing animation clip (from game.animator.clip).  on_end called at the end of the clip (every cycle
+        for looping clips) - returns its timer"""
 
-        # frames = anim_reel  # list of sprite animations
-        current_frame_index = int((self.timer // time_period) % len(anim_reel))
-        self.image = anim_reel[current_frame_index]
-        return current_frame_index
+        self.clip = clip
+        self.anim_start = self.game.timers.now
+        if on_end:
+            return self.game.timers.schedule(clip.duration, on_end, repeat=clip.loop)
 
-    def check_anim_end(self, time_period, anim_reel):
-        """ check if animation will return to 1st frame on next game loop"""
-        if int((self.timer // time_period) % len(anim_reel)) < self.current_frame_index:
-            return True
+    def animate(self):
+        """ set image to current frame of clip, return frame index.  Frame worked out from the shared animation clock so
+        there is nothing to advance per frame"""
+
+        current_frame_index = self.game.animator.frame(self.clip, self.anim_start)
+        self.image = self.clip.frames[current_frame_index]
+        return current_frame_index
 
     def draw(self):
 
@@ -40,6 +57,8 @@ class Static_sprite(pygame.sprite.Sprite):
 
 class Platform(Static_sprite):
 
+    layer = 'platforms'
+
     def __init__(self, start_x, start_y, image):
         "Generates a single platform tile."
         super().__init__(start_x, start_y, image)
@@ -47,9 +66,13 @@ class Platform(Static_sprite):
 
 class Pick_up(Static_sprite):
 
-    def __init__(self, start_x, start_y, image):
+    def __init__(self, game, col, row, refkey, image):
         "Generates a single pick_up tile."
-        super().__init__(start_x, start_y, image)
+        super().__init__(game, col, row, refkey, image)
+
+    def kill(self):
+        self.game.pickup_hash.remove(self)
+        super().kill()
 
     def apply_pickup(self, player):
         player.game.score += 50
@@ -66,13 +89,10 @@ class Mobile_sprite(Static_sprite):
         self.angle = 0  # angle subtended from vector (1, 0) i.e. anticlockwise from the x-axis
         self.vel = vec(0, 0)  # unit vector to be multiplied by runspeed
 
-        self.current_grids = self.get_grids()  # grids for which sprite overlaps
-
         self.actionvar = "idle"  # current sprite action
         self.newaction = "idle"  # new sprite action on e.g. keyboard input- jumping, walking etc
 
         # handle animations
-        self.timer = 0  # used to trigger next frame for animations (can set to -ve value to delay start of an animation
         self.current_frame_index = 0  # used to check if at end of animation reel i.e. at next game loop animation will start over
 
     def get_unit_vel(self, directionKeys):
@@ -86,41 +106,29 @@ class Mobile_sprite(Static_sprite):
             self.vel = self.vel.normalize()  # return unit vector with magnitude == 1 ( vec[1, 1] would have magnitude sqrt(2) without this step)
             return True
 
-    def get_grids(self):
-        """ Return grid or multiple grids if between boundaries to check for collisions"""
-
-        def lookupgrid(pos):
-            x, y = int(pos[0]), int(pos[1])
-            x = min((self.game.map.width-2*TILESIZE), x)  # limit possible x pos to within map width (2340)
-            y = min((self.game.map.height-2*TILESIZE), y) # 900
-            grid_col = (x-TILESIZE)//GRIDWIDTH
-            grid_row = (y-TILESIZE)//GRIDHEIGHT
-            return self.game.grid_squares[grid_row][grid_col]
-
-        grids = map(lookupgrid, (self.rect.topleft,
-                                 self.rect.topright,
-                                 self.rect.bottomleft,
-                                 self.rect.bottomright))
-        grids = list(set(grids))  # return grids minus duplicates
-
-        return grids
-
     def collide_platforms(self, axis):  # [0, 1] for either [x, y] axis
 
         self.rect[axis] = self.pos[axis]  # update rect with new position
-        self.current_grids = self.get_grids()  # must be before spritecollide
-        totalhits = []  # if colling with sprites in multiple grids when between grid boundaries
-        for grid in self.current_grids:
-            hits = pygame.sprite.spritecollide(self, grid, False)
-            totalhits += hits
-
-        if totalhits:
-
-            d = int(self.vel[axis] / fabs(self.vel[axis]))  # direction of travel: left = -1, right = 1, up = -1, down = 1
-            # overlap between self.rect and platform.rect
-            overlap = 0.5*d*(self.rect.size[axis] + totalhits[0].rect.size[axis]) - (totalhits[0].rect.center[axis] - self.rect.center[axis])
+        if self.vel[axis] == 0:
+            return  # not travelling along axis
+        d = 1 if self.vel[axis] > 0 else -1  # direction of travel: left = -1, right = 1, up = -1, down = 1
+
+        if COLLISIONMODE == 'tiles':
+            # index solidity grid for tiles under self.rect only
+            newpos = self.game.solid_grid.resolve_axis(self.rect, axis, d)
+            if newpos is None:
+                return
+            self.pos[axis] = newpos  # reset position so no longer colliding
+        else:
+            totalhits = self.game.platform_hash.query_rect(self.rect)  # platforms overlapping self.rect
+            if not totalhits:
+                return
+            # overlap between self.rect and platform.rect.  Push out of the first platform met in direction of travel (greatest overlap)
+            overlap = max((0.5*d*(self.rect.size[axis] + hit.rect.size[axis]) - (hit.rect.center[axis] - self.rect.center[axis]) for hit in totalhits),
+                          key=lambda o: d*o)
             self.pos[axis] -= overlap  # reset position so no longer colliding
-            self.rect[axis] = self.pos[axis]  # update rect position
+
+        self.rect[axis] = self.pos[axis]  # update rect position
 
     def atMapBoundaries(self):
         """ Check if at map boundaries (collision detection not used for platforms at boundary)"""
@@ -137,13 +145,15 @@ class Mobile_sprite(Static_sprite):
         """ change action from e.g. jumping to falling.  First check current action to see if action has actually changed then return new actionvar"""
         if self.actionvar != newaction:
             self.actionvar = newaction
-            self.timer = 0  # set timer at start of animation.  Resets to zero when switching to other animation
+            self.anim_start = self.game.timers.now  # start of animation.  Reset when switching to other animation
             self.current_frame_index = 0  # first animation slide
 
 
 class Player(Mobile_sprite):
 
+    layer = 'player'
     runspeed = 8
+    reload_time = 0  # seconds between shots, 0 - no cooldown (fire every frame)
 
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game, col, row, refkey, image)
@@ -152,43 +162,65 @@ class Player(Mobile_sprite):
         self.direction = 'North'
         self.directionKeys = [0, 0, 0, 0]  # see get_direction()
         self.dead = False
-
-        self.current_grids = self.get_grids()  # grids for which player sprite overlaps
         self.actionvar = "player_idle"  # current sprite action
         self.newaction = "player_idle"  # new sprite action on e.g. keyboard input- jumping, walking etc
-        self.current_animation = game.player_images[self.actionvar]  # current animation slide (list of images)
+        self.clip_key = None  # (action, direction) of clip playing
+        self.reloading = False  # weapon cooling down, cleared by game.timers
+        self.shots = 0
+        self.contacts = 0  # mobs collided with
+        self.first_contact = None  # game.elapsed_time of first mob collision
 
     def get_direction(self):
         """compare directionKeys to ORIENTATIONS and return accordingly"""
-        keys = pygame.key.get_pressed()
+        keys = self.game.get_pressed()
         self.directionKeys = [keys[pygame.K_RIGHT], keys[pygame.K_LEFT], keys[pygame.K_DOWN], keys[pygame.K_UP]]  # e.g. [1, 0, 0, 1] will return NorthEast from ORIENTATIONS
         for key, value in ORIENTATIONS.items():
             if self.directionKeys == value:
                 self.direction = key
 
+    def reload(self):
+        self.reloading = False
+
     def shoot(self):
 
-        harpoonimg = 'harpoon' + self.direction  # image keyref according to direction being fired e.g. 'harpoonWest'
-        missile_img = self.game.weapons_images[harpoonimg][0]
-        missile = Missile(self.game, 0, 0, 'harpoon', missile_img)
-        self.game.active_sprites.add(missile)
-        self.game.all_sprites.add(missile)
+        if self.reloading:
+            return
+        missile = self.game.missile_pool.acquire()  # None if every missile already in use
+        if missile is None and self.game.hold_sprites:
+            next(iter(self.game.hold_sprites)).kill()  # recycle oldest missile stuck in a wall
+            missile = self.game.missile_pool.acquire()
+        if missile:
+            harpoonimg = 'harpoon' + self.direction  # image keyref according to direction being fired e.g. 'harpoonWest'
+            missile.launch(self.direction, self.game.weapons_images[harpoonimg][0])
+            self.game.active_sprites.add(missile)
+            self.game.all_sprites.add(missile)
+            self.game.unindexed_sprites.add(missile)
+            if Player.reload_time:
+                self.reloading = True
+                self.game.timers.schedule(Player.reload_time, self.reload)
+            self.shots += 1
 
     def collide_enemy(self):
 
-        hits = pygame.sprite.spritecollide(self, self.game.mob_sprites, False, pygame.sprite.collide_rect_ratio(0.7))
-
-        if hits:
-            hits[0].dead = True  # currently mob is killed if it collides with player
-            hits[0].remove(self.game.mob_sprites)  # remove from sprite group
-            hits[0].newaction = 'enemyDeath'  # mob sprite not deleted until after its death animation
-
-    def collide_pick_up(self, pick_ups):
-
-        hits = pygame.sprite.spritecollide(self, pick_ups, False, pygame.sprite.collide_rect_ratio(0.5))
-        if hits:
-            hits[0].kill()  # delete sprite
-            hits[0].apply_pickup(self)
+        for mob in self.game.mob_hash.query_rect(self.rect):  # only mobs in nearby cells checked
+            if self.game.masks.collide(self, mob, mob_hitbox_ratio):
+                mob.dead = True  # currently mob is killed if it collides with player
+                mob.remove(self.game.mob_sprites)  # remove from sprite group
+                self.game.mob_hash.remove(mob)
+                mob.add(self.game.unindexed_sprites)  # still drawn until end of death animation
+                mob.newaction = 'enemyDeath'  # mob sprite not deleted until after its death animation
+                self.contacts += 1
+                if self.first_contact is None:
+                    self.first_contact = self.game.elapsed_time
+                break
+
+    def collide_pick_up(self):
+
+        for pick_up in self.game.pickup_hash.query_rect(self.rect):
+            if collide_pickup_ratio(self, pick_up):
+                pick_up.kill()  # delete sprite
+                pick_up.apply_pickup(self)
+                break
 
     def update(self):
 
@@ -209,137 +241,247 @@ class Player(Mobile_sprite):
 
         # check sprite collisions
         self.collide_enemy()
-        # self.collide_pick_up(self.game.pick_ups)
+        # self.collide_pick_up()
 
         # player animation
         self.change_action(self.newaction)  # change self.actionvar to new action
-        self.current_animation = self.game.player_images[self.actionvar]
-        self.current_frame_index = self.animate(0.25, self.current_animation[self.direction])
-        self.timer += self.game.dt
+        if self.clip_key != (self.actionvar, self.direction):  # clip only looked up when action or direction changes
+            self.clip_key = (self.actionvar, self.direction)
+            self.clip = self.game.animator.clip(('player',) + self.clip_key,
+                                                self.game.player_images[self.actionvar][self.direction], 0.25)
+        self.current_frame_index = self.animate()
 
         self.atMapBoundaries()
 
 
 class Missile(Mobile_sprite):
+    """ Created up front by game.missile_pool and relaunched by Player.shoot.  kill() returns missile to the pool"""
 
+    layer = 'projectiles'
     runspeed = 25
 
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game,  col, row, refkey, image)
-        self.pos = vec(game.player.rect.centerx, game.player.rect.centery)
+        self.direction = 'East'
+
+    def launch(self, direction, image):
+        """ fire missile from player centre in direction e.g. 'NorthWest'"""
+
+        self.image = self.ref_image = image
+        self.rect = image.get_rect()  # harpoon image size depends on direction
+        self.pos = vec(self.game.player.rect.centerx, self.game.player.rect.centery)
+        self.rect.center = self.pos
         # self.vel = game.player.vel.normalize() * Missile.runspeed
-        self.direction = game.player.direction
+        self.direction = direction
+        self.vel = vec(0, 0)
         self.get_unit_vel(ORIENTATIONS[self.direction])
         self.vel *= Missile.runspeed
         self.vel.x += randrange(-2, 2, 1)  # vary the direction marginally
         self.vel.y += randrange(-2, 2, 1)
 
-    def collide_enemy(self):
-
-        hits = pygame.sprite.spritecollide(self, self.game.mob_sprites, False, pygame.sprite.collide_rect_ratio(0.7))
-        if hits:
-            hits[0].hitpoints -= 10
-            self.kill()
+    def kill(self):
+        if self.alive():  # only return to pool once
+            super().kill()
+            self.game.missile_pool.release(self)
+
+    def sweep_enemies(self, move):
+        """ return (time of impact, mob) of first mob hit moving by move this update, (None, None) if no hit.  Hitboxes
+        swept first, then pixel masks tested along the rest of the path for mobs whose hitbox is hit"""
+
+        box = scaled_box(self.pos, self.rect.size, mob_hitbox_ratio)
+        first_t, first_mob = None, None
+        for mob in self.game.mob_hash.query_rect(pygame.Rect(swept_bounds(box, move.x, move.y))):
+            mob_box = self.game.masks.hitbox(mob.image, mob_hitbox_ratio, mob.rect.topleft)  # mob image as drawn
+            t = sweep_box(box, move.x, move.y, mob_box)
+            if t is not None and (first_t is None or t < first_t):
+                t = self.sweep_mask(mob, move, t, 1 if first_t is None else first_t)
+                if t is not None:
+                    first_t, first_mob = t, mob
+        return first_t, first_mob
+
+    def sweep_mask(self, mob, move, t1, t2):
+        """ return first time between t1 and t2 at which missile and mob pixels overlap, None if they don't"""
+
+        masks = self.game.masks
+        steps = max(1, ceil(move.length() * (t2 - t1) / mask_sweep_step))
+        width, height = self.rect.size
+        for step in range(steps + 1):
+            t = t1 + (t2 - t1) * step / steps
+            topleft = (self.pos.x + move.x*t - width/2, self.pos.y + move.y*t - height/2)
+            if masks.overlap(self.image, topleft, mob.image, mob.rect.topleft):
+                return t
+        return None
+
+    def sweep_platforms(self, move):
+        """ return time of impact with first platform hit moving by move this update, None if no hit"""
+
+        box = scaled_box(self.pos, self.rect.size, missile_hitbox_ratio)
+        if COLLISIONMODE == 'tiles':
+            hit = self.game.solid_grid.sweep(box, move.x, move.y)  # (t, col, row, axis)
+            return hit[0] if hit else None
+
+        first_t = None
+        for platform in self.game.platform_hash.query_rect(pygame.Rect(swept_bounds(box, move.x, move.y))):
+            t = sweep_box(box, move.x, move.y, platform.rect)
+            if t is not None and (first_t is None or t < first_t):
+                first_t = t
+        return first_t
+
+    def stick(self):
+        """ stuck in platform/ map boundary: no longer updated, drawn only until off screen"""
 
-    def update(self):
+        self.vel = vec(0, 0)
+        self.add(self.game.hold_sprites)
+        self.remove(self.game.active_sprites)
 
-        self.pos += self.vel
-        self.rect.center = self.pos
-        self.current_grids = self.get_grids()  # update grid position
+    def update(self, steps=1):
 
-        self.collide_enemy()
+        # swept collision from current to new position - first impact this update, at any speed
+        move = self.vel * steps  # frames' travel since last update, see SimLOD
+        platform_t = self.sweep_platforms(move)
+        mob_t, mob = self.sweep_enemies(move)
+        if mob is not None and (platform_t is None or mob_t <= platform_t):
+            mob.hitpoints -= 10
+            self.kill()  # back to missile pool
+            return
 
-        # check platform collision
-        for grid in self.current_grids:
-            if pygame.sprite.spritecollideany(self, grid, pygame.sprite.collide_rect_ratio(0.8)):
-                self.vel = vec(0, 0)
-                self.add(self.game.hold_sprites)
-                self.remove(self.game.active_sprites)  # not longer updated, drawn only
+        self.pos += move * (1 if platform_t is None else platform_t)
+        self.rect.center = self.pos
+        if self.game.off_screen(self.rect):
+            self.kill()
+            return
 
-        if self.atMapBoundaries():
-            self.vel = vec(0, 0)
-            self.add(self.game.hold_sprites)
-            self.remove(self.game.active_sprites)
+        if platform_t is not None:
+            self.stick()
+        elif self.atMapBoundaries():
+            self.stick()
 
 
 class Bubbles(Mobile_sprite):
+    """ Idle (not in active_sprites) until start() is called by game.timers, then rise and respawn at the end of each
+    animation cycle"""
+
+    layer = 'effects'
 
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game, col, row, refkey, image)
-        self.current_animation = self.game.effects_images[self.refkey]
-        self.timer = randrange(-4, 0)
+        self.clip = game.animator.clip(('effects', refkey), game.effects_images[refkey], 0.2)
+        self.spawnpoints = game.spawnpoints  # floor tiles to respawn at, see Game.spawn_environment
+        self.timer = game.timers.schedule(-randrange(-4, 0), self.start)  # delay start 1 - 4 seconds
 
-    def update(self):
+    def start(self):
 
-        self.pos += self.vel
+        self.vel = vec(0, -8)  # velocity vector
+        self.timer = self.play(self.clip, self.respawn)  # respawn at end of every cycle
+        self.add(self.game.active_sprites)
+
+    def respawn(self):
+        respawnpoint = choice(self.spawnpoints)
+        self.pos.x, self.pos.y = respawnpoint[0]*TILESIZE, respawnpoint[1]*TILESIZE
+
+    def reset(self, pos):
+        """ back to spawn position, idle until started e.g. warm restart (see helpers/world_snapshot.py)"""
+
+        self.pos = vec(pos)
         self.rect.bottomleft = self.pos
+        self.vel = vec(0, 0)
+        self.image = self.ref_image
+        self.anim_start = self.game.timers.now
+        self.timer = self.game.timers.schedule(-randrange(-4, 0), self.start)
 
-        if self.check_anim_end(0.2, self.current_animation):
-            respawnpoint = choice(self.game.spawnpoints)
-            self.pos.x, self.pos.y = respawnpoint[0]*TILESIZE, respawnpoint[1]*TILESIZE
+    def kill(self):
+        self.game.timers.cancel(self.timer)
+        super().kill()
 
-        if self.timer >= 0:
-            self.vel = vec(0, -8)  # velocity vector
-            self.current_frame_index = self.animate(0.2, self.current_animation)
+    def update(self, steps=1):
 
-        self.timer += self.game.dt
+        self.pos += self.vel * steps
+        self.rect.bottomleft = self.pos
+        self.current_frame_index = self.animate()
 
 
 class Enemy(Mobile_sprite):
+    """ Simulation state (pos, vel, angle, hitpoints, target_vec) held in game.mob_store arrays and updated for all mobs
+    at once by MobStore.update.  Enemy sprites animate and draw from the store"""
 
+    layer = 'mobs'
     num_of_mobs = 0
     runspeed = 1
+    attack_speed = 8
     chase_player_rad = 20 * TILESIZE  # chase player if within radius
     attack_player_rad = 5 * TILESIZE  # attack player ""          ""
+    max_hitpoints = 10
 
     def __init__(self, game, col, row, refkey, image):
+        self.slot = game.mob_store.add(self)  # must be before super().__init__ sets pos, vel, angle
         super().__init__(game, col, row, refkey, image)
 
         self.vel = vec(1, 0)
         self.target_vec = self.vel  # displacement vector between player and enemy
-        self.hitpoints = 10
+        self.hitpoints = self.max_hitpoints
+        self.dead = False
+        self.lod_tier = 'near'  # set by SimLOD before each update
+        self.death_timer = None  # kills mob at end of death animation
         self.upside_down = False
-        self.deathanimation = self.game.effects_images['enemyDeath']
-        self.current_animation = self.game.mob_images[self.refkey]
+        self.death_clip = self.effect_clip('enemyDeath')
+        self.clip = game.animator.clip(('mobs', refkey), game.mob_images[refkey], 0.2)
+        self.bounds = pygame.Rect(self.rect.topleft, self.image.get_size())  # image as drawn, indexed in game.mob_hash
+        self.game.mob_store.set_params(self.slot, self)
 
         Enemy.num_of_mobs += 1
 
-    def get_target_vector(self, target):
-        """Find new target vector from mob centre to target centre"""
-        self.target_vec = vec(target.rect.centerx, target.rect.centery) - vec(self.rect.centerx, self.rect.centery)  # find new target vector
+    def effect_clip(self, key):
+        """ death animation clip from effects images e.g. 'enemyDeath2x1'"""
+        return self.game.animator.clip(('effects', key), self.game.effects_images[key], 0.2, loop=False)
 
-    def transform_image(self):
-        """Flip image about y axis if sprite is upside down, then rotate image about rect.center"""
+    # attributes stored in game.mob_store
+    @property
+    def pos(self):
+        return vec(self.game.mob_store.pos[self.slot].tolist())
 
-        if (self.angle < -90 or self.angle > 90):
-            self.ref_image = pygame.transform.flip(self.ref_image, False, True)
-        self.image = pygame.transform.rotate(self.ref_image, self.angle)
-        # self.rect = self.image.get_rect(center=self.rect.center)
+    @pos.setter
+    def pos(self, value):
+        self.game.mob_store.pos[self.slot] = value
+
+    @property
+    def vel(self):
+        return vec(self.game.mob_store.vel[self.slot].tolist())
 
-    def chase_player(self):
+    @vel.setter
+    def vel(self, value):
+        self.game.mob_store.vel[self.slot] = value
 
-        if self.attack_player_rad < self.target_vec.length() < self.chase_player_rad:
-            # self.turn_around()
-            self.angle = vec(self.target_vec.x, self.target_vec.y).angle_to(vec(1, 0))  # angle sprite so facing target
+    @property
+    def target_vec(self):
+        return vec(self.game.mob_store.target[self.slot].tolist())
 
-            target_direction = vec(0, 0)  # e.g. (1, 0) travelling to right of screen (no y component)
-            if self.target_vec.x != 0:
-                target_direction.x = self.target_vec.x / fabs(self.target_vec.x)   # return -1, 1  for left, right respect. ...
-            if self.target_vec.y != 0:
-                target_direction.y = self.target_vec.y / fabs(self.target_vec.y)   # return -1, 1  for up, down respect. ...
+    @target_vec.setter
+    def target_vec(self, value):
+        self.game.mob_store.target[self.slot] = value
 
-            target_vel = self.target_vec.normalize() * self.runspeed  # velocity vector towards player position with magnitude equal to runspeed
+    @property
+    def angle(self):
+        return float(self.game.mob_store.angle[self.slot])
 
-            # accelerate towards player
-            self.vel.x = sqrt(self.runspeed * fabs(target_vel.x))
-            self.vel.x *= target_direction.x
-            self.vel.y = sqrt(self.runspeed * fabs(target_vel.y))
-            self.vel.y *= target_direction.y
+    @angle.setter
+    def angle(self, value):
+        self.game.mob_store.angle[self.slot] = value
 
-    def attack_player(self):
+    @property
+    def hitpoints(self):
+        return float(self.game.mob_store.hitpoints[self.slot])
 
-        if self.target_vec.length() < self.attack_player_rad:
-            self.vel = self.vel.normalize()*8
+    @hitpoints.setter
+    def hitpoints(self, value):
+        self.game.mob_store.hitpoints[self.slot] = value
+
+    def transform_image(self):
+        """Flip image about y axis if sprite is upside down, then rotate image about rect.center.  Rotated images taken
+        from game.rotation_cache so each (frame, angle bucket) only rotated once"""
+
+        angle = self.game.mob_store.angles[self.slot]  # angle to face player from last MobStore.update
+        self.image = self.game.rotation_cache.get(self.refkey, self.current_frame_index, self.ref_image, angle)
+        # self.rect = self.image.get_rect(center=self.rect.center)
 
     def turn_around(self):
         """INCOMPLETE"""
@@ -359,30 +501,56 @@ class Enemy(Mobile_sprite):
         # if self.target_vel.y != 0:
         #     target_direction.y = self.target_vel.y / fabs(self.target_vel.y)
 
-    def update(self):
+    def update(self, steps=1):
+        # moved by MobStore.update every frame while awake - steps not needed
 
-        self.current_frame_index = self.animate(0.2, self.current_animation)
-        self.timer += self.game.dt
-        self.ref_image = self.current_animation[self.current_frame_index]  # current animation frame before any transformation (rotation, flip etc)
+        self.current_frame_index = self.animate()
+        self.ref_image = self.image  # current animation frame before any transformation (rotation, flip etc)
 
         if self.hitpoints > 0:
-            self.get_target_vector(self.game.player)  # find new target vector
-
-            self.chase_player()
-            self.attack_player()
-            self.transform_image()  # must be after self.animate in order to transform current image
+            # target vector, chase and attack player computed for all mobs by MobStore.update
+            if self.lod_tier == 'near':  # off screen mobs (SimLOD mid tier) not rotated
+                self.transform_image()  # must be after self.animate in order to transform current image
 
         # if self.target_vec.x * self.vel.x < 0 or self.target_vec.y * self.vel.y < 0:  # if moving away from player
-        else:
+        elif self.death_timer is None:
             self.dead = True
+            self.game.kills += 1  # shot by player
             self.newaction = 'explode'
-            self.current_animation = self.deathanimation
             self.change_action(self.newaction)  # change self.actionvar to new action
-            if self.check_anim_end(0.2, self.current_animation):
-                self.kill()
-
+            self.death_timer = self.play(self.death_clip, self.kill)  # killed at end of death animation
+
+        self.rect.topleft = self.game.mob_store.topleft[self.slot]  # position moved on by MobStore.update
+        self.bounds.topleft = self.rect.topleft
+        self.bounds.size = self.image.get_size()  # rotated image larger than rect
+        if self in self.game.mob_hash:  # mobs hit by player removed from hash
+            self.game.mob_hash.move(self)  # update broadphase cells
+
+    def reset(self, slot):
+        """ back to state as loaded from map data e.g. warm restart (see helpers/world_snapshot.py).  game.mob_store
+        already restored - hitpoints and class parameters set again so any change to them applies"""
+
+        self.slot = slot
+        self.clip = self.game.animator.clip(('mobs', self.refkey), self.game.mob_images[self.refkey], 0.2)
+        self.image = self.ref_image = self.clip.frames[0]
+        self.rect = self.image.get_rect()
         self.rect.topleft = self.pos
-        self.pos += self.vel
+        self.bounds = pygame.Rect(self.rect.topleft, self.image.get_size())
+        self.anim_start = self.game.timers.now
+        self.current_frame_index = 0
+        self.actionvar = self.newaction = 'idle'
+        self.hitpoints = self.max_hitpoints
+        self.dead = False
+        self.lod_tier = 'near'
+        self.death_timer = None
+        self.game.mob_store.set_params(slot, self)
+
+    def kill(self):
+        if self.alive():
+            self.game.mob_hash.remove(self)
+            self.game.mob_store.remove(self.slot)
+            self.game.timers.cancel(self.death_timer)
+        super().kill()
 
 
 class Dartfish(Enemy):
@@ -393,25 +561,26 @@ class Dartfish(Enemy):
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game, col, row, refkey, image)
 
-        self.deathanimation = self.game.effects_images['enemyDeath2x1']
+        self.death_clip = self.effect_clip('enemyDeath2x1')
 
 
 class Spinefish(Enemy):
 
     runspeed = 2
     # runspeed = 1
+    max_hitpoints = 20
 
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game, col, row, refkey, image)
 
-        self.hitpoints = 20
-        self.deathanimation = self.game.effects_images['enemyDeath2x1']
+        self.death_clip = self.effect_clip('enemyDeath2x1')
 
 
 class Daddyfish(Enemy):
 
+    max_hitpoints = 100
+
     def __init__(self, game, col, row, refkey, image):
         super().__init__(game, col, row, refkey, image)
 
-        self.hitpoints = 100
-        self.deathanimation = self.game.effects_images['enemyDeath4x4']
+        self.death_clip = self.effect_clip('enemyDeath4x4')